@@ -0,0 +1,108 @@
+from esai import Mesh
+from typing import Dict
+from collections import OrderedDict
+from threading import Lock
+import os
+
+class MeshCache:
+    def __init__(self, budget : int = 256 << 20, optimize : bool = True, quantize : bool = False, lods : bool = True):
+        self.budget    = budget
+        self.optimize  = optimize
+        self.quantize  = quantize
+        self.lods      = lods
+        self.entries   : 'OrderedDict[str, Mesh]' = OrderedDict()
+        self.refs      : Dict[str, int] = {}
+        self.sizes     : Dict[str, int] = {}
+        self.memory    = 0
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+        self.lock      = Lock()
+
+    def acquire(self, path : str) -> Mesh:
+        key = os.path.realpath(path)
+
+        with self.lock:
+            if (mesh := self.entries.get(key)) is not None:
+                self.entries.move_to_end(key)
+                self.refs[key] += 1
+                self.hits      += 1
+                return mesh
+            self.misses += 1
+
+        mesh = Mesh.load_obj(path, optimize=self.optimize, quantize=self.quantize, lods=self.lods)
+        mesh.positions.flags.writeable = False
+        mesh.indices.flags.writeable  = False
+
+        with self.lock:
+            if (existing := self.entries.get(key)) is not None:
+                mesh = existing
+                self.entries.move_to_end(key)
+            else:
+                self.entries[key] = mesh
+                self.refs[key]    = 0
+                self.sizes[key]   = mesh.nbytes
+                self.memory      += mesh.nbytes
+            self.refs[key] += 1
+            self._evict()
+
+        return mesh
+
+    def release(self, path : str):
+        key = os.path.realpath(path)
+
+        with self.lock:
+            if self.refs.get(key, 0) <= 0:
+                raise KeyError(f"Mesh '{path}' is not acquired.")
+            self.refs[key] -= 1
+            self._evict()
+
+    def clear(self):
+        with self.lock:
+            for key in [key for key, refs in self.refs.items() if refs == 0]:
+                self._remove(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            self._account()
+            return {
+                'meshes':    len(self.entries),
+                'memory':    self.memory,
+                'budget':    self.budget,
+                'hits':      self.hits,
+                'misses':    self.misses,
+                'evictions': self.evictions
+            }
+
+    def _account(self):
+        for key, mesh in self.entries.items():
+            if (size := mesh.nbytes) != self.sizes[key]:
+                self.memory    += size - self.sizes[key]
+                self.sizes[key] = size
+
+    def _evict(self):
+        self._account()
+        if self.memory <= self.budget:
+            return
+
+        for key in [key for key in self.entries if self.refs[key] == 0]:
+            self._remove(key)
+            self.evictions += 1
+            if self.memory <= self.budget:
+                break
+
+    def _remove(self, key : str):
+        self.entries.pop(key)
+        self.memory -= self.sizes.pop(key)
+        del self.refs[key]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __str__(self) -> str:
+        return f"<MeshCache {len(self.entries)} mesh(es), {self.memory}/{self.budget} byte(s)>"
+
+    def __repr__(self) -> str:
+        return f"<MeshCache {len(self.entries)} mesh(es), {self.memory}/{self.budget} byte(s)>"
+
+mesh_cache = MeshCache()
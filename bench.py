@@ -0,0 +1,194 @@
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from world import Camera, Transform, GameObject
+from profiler import FrameProfiler
+from raster import Framebuffer
+from esai import Mesh, vec3
+from typing import Dict, List, Tuple, Optional
+from time import strftime
+from math import pi, sin, cos
+import numpy as np
+import platform
+import subprocess
+import argparse
+import json
+import sys
+
+STAGES        = ('clear', 'transform', 'clip', 'raster', 'occlusion', 'present')
+MODES         = ('wireframe', 'solid')
+ORBIT_FRAMES  = 120
+WARMUP_FRAMES = 3
+
+WALLS = {
+    'interior': ('meshes/cube.obj', 5.0, 2.0)
+}
+
+SCENES = {
+    'cube':           ('meshes/cube.obj',      9, 8.0, 60),
+    'icosphere':      ('meshes/icosphere.obj', 9, 8.0, 60),
+    'suzanne':        ('meshes/suzanne.obj',   9, 8.0, 60),
+    'interior':       ('meshes/suzanne.obj',   9, 8.0, 60),
+    'synthetic-10k':  (10_000,                 1, 6.0, 30),
+    'synthetic-100k': (100_000,                1, 6.0, 10),
+    'synthetic-1m':   (1_000_000,              1, 6.0, 3)
+}
+
+def synthetic_mesh(triangles : int) -> Mesh:
+    rows = max(2, int(round((triangles / 2.0) ** 0.5)))
+    cols = max(3, triangles // (2 * rows))
+
+    theta, phi = np.meshgrid(np.linspace(0.0, pi, rows + 1), np.linspace(0.0, 2.0 * pi, cols + 1), indexing='ij')
+    vertices   = np.stack((np.sin(theta) * np.cos(phi), np.cos(theta), np.sin(theta) * np.sin(phi)), axis=-1).reshape(-1, 3) * 2.0
+
+    r, c = np.meshgrid(np.arange(rows), np.arange(cols), indexing='ij')
+    a    = (r * (cols + 1) + c).ravel()
+    b, d = a + 1, a + cols + 1
+    return Mesh(vertices, np.concatenate((np.column_stack((a, d, b)), np.column_stack((b, d, d + 1)))))
+
+def create_scene(name : str, size : Tuple[int, int]) -> Tuple[Camera, List[GameObject], float]:
+    source, count, radius, _ = SCENES[name]
+    mesh   = Mesh.load_obj(source) if isinstance(source, str) else synthetic_mesh(source)
+    side   = int(round(count ** 0.5))
+    camera = Camera(Transform.identity(), 120.0, size, 0.001, 1000.0)
+    camera.lod_error = None
+
+    objects = [
+        GameObject(
+            f'{name}.{index}',
+            Transform(vec3((index % side - (side - 1) / 2.0) * 3.0, 0.0, (index // side - (side - 1) / 2.0) * 3.0), vec3.zero(), vec3.one()),
+            mesh,
+            Transform.zero(),
+            (255, 255, 255)
+        )
+        for index in range(count)
+    ]
+
+    if name in WALLS:
+        source, distance, height = WALLS[name]
+        wall = Mesh.load_obj(source)
+        objects += [
+            GameObject(
+                f'{name}.wall.{index}',
+                Transform(vec3(x * distance, 0.0, z * distance), vec3.zero(), vec3(abs(z) * distance + 0.1, height, abs(x) * distance + 0.1)),
+                wall,
+                Transform.zero(),
+                (128, 128, 128),
+                occluder=True
+            )
+            for index, (x, z) in enumerate(((0, 1), (0, -1), (1, 0), (-1, 0)))
+        ]
+    return camera, objects, radius
+
+def place_camera(camera : Camera, radius : float, frame : int):
+    theta = 2.0 * pi * frame / ORBIT_FRAMES
+    camera.transform.position = vec3(-radius * sin(theta), 0.0, -radius * cos(theta))
+    camera.transform.rotation = vec3(0.0, theta, 0.0)
+    camera.update()
+
+def run(name : str, mode : str, size : Tuple[int, int], frames : Optional[int] = None, workers : int = 0) -> Dict:
+    camera, objects, radius = create_scene(name, size)
+    target    = Framebuffer.offscreen(size)
+    present   = np.empty_like(target.color)
+    frames    = frames or SCENES[name][3]
+    triangles = sum(obj.mesh.triangle_count for obj in objects)
+
+    camera.workers = workers
+    profiler       = FrameProfiler(frames)
+
+    try:
+        for frame in range(WARMUP_FRAMES + frames):
+            if frame == WARMUP_FRAMES:
+                camera.profiler = profiler
+
+            profiler.begin_frame()
+            place_camera(camera, radius, frame)
+            camera.clear(target)
+            camera.render_objects(target, objects, mode)
+            camera.flush(target)
+
+            with profiler.scope('present'):
+                np.copyto(present, target.color)
+            profiler.end_frame()
+    finally:
+        camera.close()
+
+    average = profiler.average()
+    return {
+        'frames':               frames,
+        'triangles':            triangles,
+        'ms_per_frame':         average['ms'],
+        'fps':                  average['fps'],
+        'triangles_per_second': triangles * average['fps'],
+        'stages':               {stage: average['timings'].get(stage, 0.0) for stage in STAGES},
+        'counters':             average['counters']
+    }
+
+def metadata(size : Tuple[int, int], workers : int) -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+
+    return {
+        'commit':   commit,
+        'time':     strftime('%Y-%m-%dT%H:%M:%S'),
+        'python':   platform.python_version(),
+        'numpy':    np.__version__,
+        'platform': platform.platform(),
+        'size':     list(size),
+        'workers':  workers
+    }
+
+def compare(results : Dict, baseline : Dict, threshold : float) -> bool:
+    regressed = False
+
+    print(f'\n{"benchmark":<26}{"base ms":>10}{"new ms":>10}{"change":>9}')
+    for key, result in results.items():
+        if (base := baseline.get(key)) is None:
+            continue
+
+        change = result['ms_per_frame'] / base['ms_per_frame'] - 1.0
+        flag   = ''
+        if change > threshold:
+            flag      = '  REGRESSION'
+            regressed = True
+        print(f'{key:<26}{base["ms_per_frame"]:>10.2f}{result["ms_per_frame"]:>10.2f}{change:>+9.1%}{flag}')
+
+    return regressed
+
+def main(argv : Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Deterministic renderer benchmarks with per-stage timings.')
+    parser.add_argument('--scenes',    nargs='+', choices=tuple(SCENES), default=list(SCENES))
+    parser.add_argument('--modes',     nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--size',      default='800x600', help='framebuffer size as WIDTHxHEIGHT')
+    parser.add_argument('--frames',    type=int, help='override the per-scene frame count')
+    parser.add_argument('--workers',   type=int, default=0, help='rasterizer worker processes')
+    parser.add_argument('--output',    help='write results to this JSON file')
+    parser.add_argument('--compare',   help='compare against a previous JSON result file')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    size    = tuple(int(v) for v in args.size.lower().split('x'))
+    results = {}
+
+    print(f'{"benchmark":<26}{"ms/frame":>10}{"Mtri/s":>9}' + ''.join(f'{stage:>11}' for stage in STAGES))
+    for scene in args.scenes:
+        for mode in args.modes:
+            key    = f'{scene}/{mode}'
+            result = results[key] = run(scene, mode, size, args.frames, args.workers)
+            print(f'{key:<26}{result["ms_per_frame"]:>10.2f}{result["triangles_per_second"] / 1e6:>9.2f}' + ''.join(f'{result["stages"][stage]:>11.2f}' for stage in STAGES))
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump({'meta': metadata(size, args.workers), 'results': results}, fp, indent=4)
+
+    if args.compare:
+        with open(args.compare, 'r') as fp:
+            if compare(results, json.load(fp)['results'], args.threshold):
+                return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -1,5 +1,22 @@
-from typing import Union, Tuple, List
+from typing import Union, Tuple, List, Optional, Sequence
 from math import sqrt, cos, sin, inf
+import numpy as np
+import os
+import re
+import struct
+
+MESH_CACHE_MAGIC   = b'ESAIMESH'
+MESH_CACHE_VERSION = 3
+MESH_CACHE_HEADER  = struct.Struct('<8sIIqqqqq')
+MESH_CACHE_LOD     = struct.Struct('<qqd')
+MESH_OPTIMIZED     = 1
+MESH_QUANTIZED     = 2
+MESH_LODS          = 4
+VERTEX_CACHE_SIZE  = 16
+QUANTIZE_RANGE     = 65535
+LOD_LEVELS         = 4
+LOD_MIN_TRIANGLES  = 16
+LOD_REDUCTION      = 0.6
 
 class vec2:
     __slots__ = ('x', 'y')
@@ -274,6 +291,33 @@ class mat4:
 
         return inverse
     
+    def invert_affine(self) -> 'mat4':
+        sx = self.a * self.a + self.e * self.e + self.i * self.i
+        sy = self.b * self.b + self.f * self.f + self.j * self.j
+        sz = self.c * self.c + self.g * self.g + self.k * self.k
+
+        if sx == 0 or sy == 0 or sz == 0:
+            raise Exception("Matrix can't be inverted.")
+        
+        a, b, c = self.a / sx, self.e / sx, self.i / sx
+        e, f, g = self.b / sy, self.f / sy, self.j / sy
+        i, j, k = self.c / sz, self.g / sz, self.k / sz
+
+        return mat4(
+            a, b, c, -(a * self.d + b * self.h + c * self.l),
+            e, f, g, -(e * self.d + f * self.h + g * self.l),
+            i, j, k, -(i * self.d + j * self.h + k * self.l),
+            0.0, 0.0, 0.0, 1.0
+        )
+    
+    def to_array(self) -> np.ndarray:
+        return np.array((
+            (self.a, self.b, self.c, self.d),
+            (self.e, self.f, self.g, self.h),
+            (self.i, self.j, self.k, self.l),
+            (self.m, self.n, self.o, self.p)
+        ), dtype=np.float64)
+    
     @staticmethod
     def identity() -> 'mat4':
         return mat4(
@@ -351,35 +395,673 @@ class mat4:
         values = [self.a, self.b, self.c, self.d, self.e, self.f, self.g, self.h, self.i, self.j, self.k, self.l, self.m, self.n, self.o, self.p]
         return "mat4(%s)"  % (', '.join(map(lambda v: str(v), values)), )
 
+class _vector_array:
+    __slots__ = ('data',)
+    width     = 0
+    scalar    = None
+
+    def __init__(self, data : np.ndarray):
+        self.data = np.ascontiguousarray(data, dtype=np.float64).reshape(-1, self.width)
+    
+    def value(self, value) -> Union[np.ndarray, float]:
+        if isinstance(value, _vector_array):
+            return value.data
+        if isinstance(value, self.scalar):
+            return np.array([getattr(value, axis) for axis in self.scalar.__slots__])
+        return value
+
+    def operand(self, operand) -> Union[np.ndarray, float]:
+        return self.rows(self.value(operand))
+
+    def rows(self, value) -> Union[np.ndarray, float]:
+        if isinstance(value, np.ndarray) and value.ndim == 1 and len(value) == len(self.data):
+            return value[:, None]
+        return value
+
+    def __add__(self, operand) -> '_vector_array':
+        return self.__class__(self.data + self.operand(operand))
+    
+    def __sub__(self, operand) -> '_vector_array':
+        return self.__class__(self.data - self.operand(operand))
+    
+    def __mul__(self, operand) -> '_vector_array':
+        return self.__class__(self.data * self.operand(operand))
+    
+    def __truediv__(self, operand) -> '_vector_array':
+        return self.__class__(self.data / self.operand(operand))
+    
+    def __iadd__(self, operand) -> '_vector_array':
+        np.add(self.data, self.operand(operand), out=self.data)
+        return self
+    
+    def __isub__(self, operand) -> '_vector_array':
+        np.subtract(self.data, self.operand(operand), out=self.data)
+        return self
+    
+    def __imul__(self, operand) -> '_vector_array':
+        np.multiply(self.data, self.operand(operand), out=self.data)
+        return self
+    
+    def __itruediv__(self, operand) -> '_vector_array':
+        np.divide(self.data, self.operand(operand), out=self.data)
+        return self
+    
+    def add_scaled(self, operand, scale : Union[float, np.ndarray]):
+        self.data += self.operand(operand) * self.rows(scale)
+    
+    def magnitude(self) -> np.ndarray:
+        return np.sqrt(np.einsum('ij,ij->i', self.data, self.data))
+    
+    def dot(self, operand) -> np.ndarray:
+        return (self.data * self.operand(operand)).sum(axis=1)
+    
+    @classmethod
+    def zero(cls, count : int) -> '_vector_array':
+        return cls(np.zeros((count, cls.width)))
+    
+    @classmethod
+    def one(cls, count : int) -> '_vector_array':
+        return cls(np.ones((count, cls.width)))
+    
+    @classmethod
+    def distance(cls, a : '_vector_array', b : '_vector_array') -> np.ndarray:
+        return (b - a).magnitude()
+    
+    @classmethod
+    def lerp(cls, a : '_vector_array', b : '_vector_array', time : Union[float, np.ndarray]) -> '_vector_array':
+        return cls(a.data + a.rows(time) * (b.data - a.data))
+    
+    @classmethod
+    def from_list(cls, vectors : Sequence) -> '_vector_array':
+        return cls(np.array([[getattr(vector, axis) for axis in cls.scalar.__slots__] for vector in vectors], dtype=np.float64))
+    
+    def to_list(self) -> List:
+        return [self.scalar(*row) for row in self.data.tolist()]
+    
+    def copy(self) -> '_vector_array':
+        return self.__class__(self.data.copy())
+    
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.scalar(*self.data[index].tolist())
+        return self.__class__(self.data[index])
+    
+    def __setitem__(self, index, value):
+        self.data[index] = self.value(value)
+    
+    def __len__(self) -> int:
+        return len(self.data)
+    
+    def __str__(self) -> str:
+        return f"({self.__class__.__name__}, {len(self.data)} element(s))"
+    
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.data.tolist()})"
+
+class vec3_array(_vector_array):
+    __slots__ = ()
+    width     = 3
+    scalar    = vec3
+
+    def cross(self, operand) -> 'vec3_array':
+        return vec3_array(np.cross(self.data, self.operand(operand)))
+    
+    def to_vec4(self) -> 'vec4_array':
+        return vec4_array(np.column_stack((self.data, np.zeros(len(self.data)))))
+    
+    def to_homogenous(self) -> 'vec4_array':
+        return vec4_array(np.column_stack((self.data, np.ones(len(self.data)))))
+
+class vec4_array(_vector_array):
+    __slots__ = ()
+    width     = 4
+    scalar    = vec4
+
+    def to_vec3(self) -> 'vec3_array':
+        return vec3_array(self.data[:, :3])
+    
+    def to_cartesian(self) -> 'vec3_array':
+        return vec3_array(self.data[:, :3] / self.data[:, 3:])
+
+class mat4_array:
+    __slots__ = ('data',)
+
+    def __init__(self, data : np.ndarray):
+        self.data = np.ascontiguousarray(data, dtype=np.float64).reshape(-1, 4, 4)
+    
+    def operand(self, operand) -> np.ndarray:
+        if isinstance(operand, mat4_array):
+            return operand.data
+        if isinstance(operand, mat4):
+            return operand.to_array()
+        return operand
+
+    def __matmul__(self, operand : Union['mat4_array', mat4, np.ndarray]) -> 'mat4_array':
+        return mat4_array(self.data @ self.operand(operand))
+    
+    def __mul__(self, operand : Union[vec4_array, vec4]) -> vec4_array:
+        if isinstance(operand, vec4):
+            operand = vec4_array(np.array((operand.x, operand.y, operand.z, operand.w)))
+        return vec4_array(np.matmul(self.data, operand.data[..., None])[..., 0])
+    
+    def transform_points(self, points : vec3_array) -> vec3_array:
+        return vec3_array(np.matmul(self.data[:, :3, :3], points.data[..., None])[..., 0] + self.data[:, :3, 3])
+    
+    def invert(self) -> 'mat4_array':
+        if (np.linalg.det(self.data) == 0).any():
+            raise Exception("Matrix can't be inverted.")
+        return mat4_array(np.linalg.inv(self.data))
+    
+    def invert_affine(self) -> 'mat4_array':
+        linear  = self.data[:, :3, :3]
+        squares = (linear ** 2).sum(axis=1)
+
+        if (squares == 0).any():
+            raise Exception("Matrix can't be inverted.")
+        
+        inverse = np.zeros_like(self.data)
+        inverse[:, :3, :3] = linear.transpose(0, 2, 1) / squares[:, :, None]
+        inverse[:, :3, 3]  = -np.matmul(inverse[:, :3, :3], self.data[:, :3, 3, None])[..., 0]
+        inverse[:, 3, 3]   = 1.0
+        return mat4_array(inverse)
+    
+    def to_array(self) -> np.ndarray:
+        return self.data
+    
+    @staticmethod
+    def identity(count : int) -> 'mat4_array':
+        return mat4_array(np.tile(np.eye(4), (count, 1, 1)))
+    
+    @staticmethod
+    def translation(vec : vec3_array) -> 'mat4_array':
+        matrices = mat4_array.identity(len(vec))
+        matrices.data[:, :3, 3] = vec.data
+        return matrices
+    
+    @staticmethod
+    def rotation_x(theta : np.ndarray) -> 'mat4_array':
+        c, s     = np.cos(theta), np.sin(theta)
+        matrices = mat4_array.identity(len(theta))
+        matrices.data[:, 1, 1], matrices.data[:, 1, 2] =  c, s
+        matrices.data[:, 2, 1], matrices.data[:, 2, 2] = -s, c
+        return matrices
+    
+    @staticmethod
+    def rotation_y(theta : np.ndarray) -> 'mat4_array':
+        c, s     = np.cos(theta), np.sin(theta)
+        matrices = mat4_array.identity(len(theta))
+        matrices.data[:, 0, 0], matrices.data[:, 0, 2] =  c, s
+        matrices.data[:, 2, 0], matrices.data[:, 2, 2] = -s, c
+        return matrices
+    
+    @staticmethod
+    def rotation_z(theta : np.ndarray) -> 'mat4_array':
+        c, s     = np.cos(theta), np.sin(theta)
+        matrices = mat4_array.identity(len(theta))
+        matrices.data[:, 0, 0], matrices.data[:, 0, 1] = c, -s
+        matrices.data[:, 1, 0], matrices.data[:, 1, 1] = s,  c
+        return matrices
+    
+    @staticmethod
+    def scale(vec : vec3_array) -> 'mat4_array':
+        matrices = mat4_array.identity(len(vec))
+        matrices.data[:, 0, 0], matrices.data[:, 1, 1], matrices.data[:, 2, 2] = vec.data.T
+        return matrices
+    
+    @staticmethod
+    def compose(position : vec3_array, rotation : vec3_array, scale : vec3_array) -> 'mat4_array':
+        (cx, cy, cz), (sx, sy, sz) = np.cos(rotation.data.T), np.sin(rotation.data.T)
+        matrices = mat4_array.identity(len(position))
+        linear   = matrices.data[:, :3, :3]
+
+        linear[:, 0, 0] =  cy * cz
+        linear[:, 0, 1] = -cy * sz
+        linear[:, 0, 2] =  sy
+        linear[:, 1, 0] =  cx * sz - sx * sy * cz
+        linear[:, 1, 1] =  cx * cz + sx * sy * sz
+        linear[:, 1, 2] =  sx * cy
+        linear[:, 2, 0] = -sx * sz - cx * sy * cz
+        linear[:, 2, 1] = -sx * cz + cx * sy * sz
+        linear[:, 2, 2] =  cx * cy
+
+        linear *= scale.data[:, None, :]
+        matrices.data[:, :3, 3] = position.data
+        return matrices
+    
+    @staticmethod
+    def from_list(matrices : Sequence[mat4]) -> 'mat4_array':
+        return mat4_array(np.array([matrix.to_array() for matrix in matrices]))
+    
+    def to_list(self) -> List[mat4]:
+        return [mat4(*row) for row in self.data.reshape(-1, 16).tolist()]
+    
+    def copy(self) -> 'mat4_array':
+        return mat4_array(self.data.copy())
+    
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return mat4(*self.data[index].ravel().tolist())
+        return mat4_array(self.data[index])
+    
+    def __setitem__(self, index, value : Union['mat4_array', mat4, np.ndarray]):
+        self.data[index] = self.operand(value)
+    
+    def __len__(self) -> int:
+        return len(self.data)
+    
+    def __str__(self) -> str:
+        return f"(mat4_array, {len(self.data)} element(s))"
+    
+    def __repr__(self) -> str:
+        return f"mat4_array({self.data.tolist()})"
+
 class Mesh:
-    def __init__(self, triangles : List[Tuple[vec3, vec3, vec3]]):
-        self.triangles  = triangles
+    def __init__(self, vertices : np.ndarray, indices : np.ndarray, dequantize : Optional[np.ndarray] = None):
+        self.positions  = np.ascontiguousarray(vertices, dtype=np.float64 if dequantize is None else np.uint16).reshape(-1, 3)
+        self.dequantize = None if dequantize is None else np.asarray(dequantize, dtype=np.float64).reshape(4, 4)
+        self.indices    = np.ascontiguousarray(indices, dtype=np.int32).reshape(-1, 3)
+        self.flags      = 0 if dequantize is None else MESH_QUANTIZED
+        self._triangles = None
+        self._bounds    = None
+        self._sphere    = None
+        self._edges     = None
+        self._lods      = None
+        self.error      = 0.0
+    
+    @property
+    def vertices(self) -> np.ndarray:
+        if self.dequantize is None:
+            return self.positions
+        return self.positions @ self.dequantize[:3, :3].T + self.dequantize[:3, 3]
+    
+    @property
+    def quantized(self) -> bool:
+        return self.dequantize is not None
+    
+    def fold(self, matrix : np.ndarray) -> np.ndarray:
+        if self.dequantize is None:
+            return matrix
+        return matrix @ self.dequantize
+    
+    @property
+    def triangles(self) -> List[List[vec3]]:
+        if self._triangles is None:
+            vertices        = [vec3(x, y, z) for x, y, z in self.vertices.tolist()]
+            self._triangles = [[vertices[a], vertices[b], vertices[c]] for a, b, c in self.indices.tolist()]
+        return self._triangles
+    
+    @property
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._bounds is None:
+            if self.vertex_count:
+                vertices     = self.vertices
+                self._bounds = (vertices.min(axis=0), vertices.max(axis=0))
+            else:
+                self._bounds = (np.zeros(3), np.zeros(3))
+        return self._bounds
+    
+    @property
+    def sphere(self) -> Tuple[np.ndarray, float]:
+        if self._sphere is None:
+            center       = (self.bounds[0] + self.bounds[1]) * 0.5
+            radius       = float(np.sqrt(((self.vertices - center) ** 2).sum(axis=1).max())) if self.vertex_count else 0.0
+            self._sphere = (center, radius)
+        return self._sphere
+    
+    @property
+    def edges(self) -> np.ndarray:
+        if self._edges is None:
+            self._build_edges()
+        return self._edges[0]
+    
+    @property
+    def face_edges(self) -> np.ndarray:
+        if self._edges is None:
+            self._build_edges()
+        return self._edges[1]
+    
+    def _build_edges(self):
+        pairs            = np.sort(self.indices[:, (0, 1, 1, 2, 2, 0)].reshape(-1, 2), axis=1)
+        edges, inverse   = np.unique(pairs, axis=0, return_inverse=True)
+        self._edges      = (edges.astype(np.int32), inverse.reshape(-1, 3).astype(np.int32))
+    
+    @property
+    def vertex_count(self) -> int:
+        return len(self.positions)
+    
+    @property
+    def triangle_count(self) -> int:
+        return len(self.indices)
+    
+    @property
+    def nbytes(self) -> int:
+        return self.positions.nbytes + self.indices.nbytes + sum(lod.nbytes for lod in (self._lods or ())[1:])
+    
+    @property
+    def lods(self) -> List['Mesh']:
+        if self._lods is None:
+            self._lods = self.generate_lods()
+        return self._lods
+    
+    def generate_lods(self, levels : int = LOD_LEVELS, min_triangles : int = LOD_MIN_TRIANGLES) -> List['Mesh']:
+        lods       = [self]
+        resolution = 1 << max(1, int(np.ceil(np.log2(max(self.vertex_count, 1) ** 0.5))))
+
+        while len(lods) <= levels and resolution >= 2 and lods[-1].triangle_count > min_triangles:
+            lod         = self.simplify(resolution)
+            resolution //= 2
+            if 0 < lod.triangle_count <= lods[-1].triangle_count * LOD_REDUCTION:
+                lods.append(lod)
+        
+        return lods
+    
+    def build_lods(self) -> 'Mesh':
+        self._lods  = self.generate_lods()
+        self.flags |= MESH_LODS
+        return self
+    
+    def simplify(self, resolution : int) -> 'Mesh':
+        lower, upper = self.bounds
+        if (size := float((upper - lower).max()) / resolution) == 0.0:
+            return self
+        
+        vertices           = self.vertices
+        cells              = np.floor((vertices - lower) / size).astype(np.int64)
+        keys               = (cells[:, 0] * (resolution + 1) + cells[:, 1]) * (resolution + 1) + cells[:, 2]
+        _, cluster, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        vertices           = np.stack([np.bincount(cluster, vertices[:, axis], len(counts)) for axis in range(3)], axis=1) / counts[:, None]
+
+        indices = cluster[self.indices]
+        indices = indices[(indices[:, 0] != indices[:, 1]) & (indices[:, 1] != indices[:, 2]) & (indices[:, 2] != indices[:, 0])]
+        _, first = np.unique(np.sort(indices, axis=1), axis=0, return_index=True)
+        indices  = indices[np.sort(first)]
+
+        used, indices = np.unique(indices, return_inverse=True)
+        mesh          = Mesh(vertices[used], indices.reshape(-1, 3))
+        mesh.error    = size * sqrt(3.0)
+        return mesh
+    
+    def optimize(self, quantize : bool = False, cache_size : int = VERTEX_CACHE_SIZE) -> 'Mesh':
+        vertices, indices = self.weld(self.vertices, self.indices)
+        indices           = indices[self.tipsify(indices, len(vertices), cache_size)]
+
+        used, first, remap = np.unique(indices.ravel(), return_index=True, return_inverse=True)
+        order              = np.argsort(first, kind='stable')
+        rank               = np.empty(len(order), dtype=np.int64)
+        rank[order]        = np.arange(len(order))
+
+        mesh        = Mesh(vertices[used[order]], rank[remap].reshape(-1, 3))
+        mesh.flags |= MESH_OPTIMIZED
+        return mesh.quantize() if quantize else mesh
+    
+    def quantize(self) -> 'Mesh':
+        if self.quantized:
+            return self
+        
+        lower, upper = self.bounds
+        step         = np.where(upper > lower, (upper - lower) / QUANTIZE_RANGE, 1.0)
+        dequantize   = np.identity(4)
+        dequantize[:3, :3] = np.diag(step)
+        dequantize[:3, 3]  = lower
+
+        mesh        = Mesh(np.rint((self.vertices - lower) / step), self.indices, dequantize)
+        mesh.flags |= self.flags
+        return mesh
+    
+    @staticmethod
+    def weld(vertices : np.ndarray, indices : np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if not len(vertices):
+            return vertices, indices
+        
+        order        = np.lexsort(vertices.T[::-1])
+        ordered      = vertices[order]
+        unique       = np.concatenate(([True], (ordered[1:] != ordered[:-1]).any(axis=1)))
+        remap        = np.empty(len(vertices), dtype=np.int64)
+        remap[order] = np.cumsum(unique) - 1
+
+        indices = remap[indices]
+        indices = indices[(indices[:, 0] != indices[:, 1]) & (indices[:, 1] != indices[:, 2]) & (indices[:, 2] != indices[:, 0])]
+        return ordered[unique], indices
     
     @staticmethod
-    def load_obj(path : str) -> 'Mesh':
+    def tipsify(indices : np.ndarray, vertex_count : int, cache_size : int = VERTEX_CACHE_SIZE) -> np.ndarray:
+        corners   = indices.ravel()
+        adjacency = (np.argsort(corners, kind='stable') // 3).tolist()
+        offsets   = np.concatenate(([0], np.cumsum(np.bincount(corners, minlength=vertex_count)))).tolist()
+        live      = np.bincount(corners, minlength=vertex_count).tolist()
+        triangles = indices.tolist()
+        stamps    = [0] * vertex_count
+        emitted   = [False] * len(triangles)
+        output    : List[int] = []
+        dead_end  : List[int] = []
+        time      = cache_size + 1
+        cursor    = 0
+        fan       = 0 if len(triangles) else -1
+
+        while fan >= 0:
+            candidates = []
+            for triangle in adjacency[offsets[fan]:offsets[fan + 1]]:
+                if emitted[triangle]:
+                    continue
+                
+                emitted[triangle] = True
+                output.append(triangle)
+                for vertex in triangles[triangle]:
+                    dead_end.append(vertex)
+                    candidates.append(vertex)
+                    live[vertex] -= 1
+                    if time - stamps[vertex] > cache_size:
+                        stamps[vertex] = time
+                        time          += 1
+            
+            fan, best = -1, -1
+            for vertex in candidates:
+                if live[vertex] > 0:
+                    priority = time - stamps[vertex] if time - stamps[vertex] + 2 * live[vertex] <= cache_size else 0
+                    if priority > best:
+                        fan, best = vertex, priority
+            
+            if fan < 0:
+                while dead_end and fan < 0:
+                    if live[vertex := dead_end.pop()] > 0:
+                        fan = vertex
+                while fan < 0 and cursor < vertex_count:
+                    if live[cursor] > 0:
+                        fan = cursor
+                    cursor += 1
+        
+        return np.array(output, dtype=np.int64)
+    
+    @staticmethod
+    def cache_miss_ratio(indices : np.ndarray, cache_size : int = VERTEX_CACHE_SIZE) -> float:
+        cache  : List[int] = []
+        misses = 0
+
+        for vertex in indices.ravel().tolist():
+            if vertex not in cache:
+                misses += 1
+                cache.append(vertex)
+                if len(cache) > cache_size:
+                    cache.pop(0)
+        
+        return misses / max(len(indices), 1)
+    
+    @staticmethod
+    def from_triangles(triangles : List[Tuple[vec3, vec3, vec3]]) -> 'Mesh':
+        lookup   : dict = {}
+        vertices : List[Tuple[float, float, float]] = []
+        indices  : List[int] = []
+
+        for triangle in triangles:
+            for v in triangle:
+                key = (v.x, v.y, v.z)
+                if (index := lookup.get(key)) is None:
+                    index = lookup[key] = len(vertices)
+                    vertices.append(key)
+                indices.append(index)
+        
+        return Mesh(np.array(vertices, dtype=np.float64), np.array(indices, dtype=np.int32))
+    
+    @staticmethod
+    def load_obj(path : str, cache : bool = True, optimize : bool = False, quantize : bool = False, lods : bool = False) -> 'Mesh':
+        flags = (MESH_OPTIMIZED if optimize else 0) | (MESH_QUANTIZED if quantize else 0) | (MESH_LODS if lods else 0)
+        store = Mesh.cache_path(path, flags)
+
+        if cache:
+            stat = os.stat(path)
+            key  = (stat.st_mtime_ns, stat.st_size)
+
+            if (mesh := Mesh.read_cache(store, key, flags)) is not None:
+                return mesh
+        
+        mesh = Mesh.parse_obj(path)
+        if optimize:
+            mesh = mesh.optimize(quantize)
+        elif quantize:
+            mesh = mesh.quantize()
+        if lods:
+            mesh.build_lods()
+        
+        if cache:
+            mesh.write_cache(store, key)
+        return mesh
+    
+    @staticmethod
+    def cache_path(path : str, flags : int) -> str:
+        suffix = ('o' if flags & MESH_OPTIMIZED else '') + ('q' if flags & MESH_QUANTIZED else '') + ('l' if flags & MESH_LODS else '')
+        return f'{path}.{suffix}.cache' if suffix else f'{path}.cache'
+    
+    @staticmethod
+    def parse_obj(path : str) -> 'Mesh':
+        positions : List[str] = []
+        corners   : List[str] = []
+        counts    : List[int] = []
+        bases     : List[int] = []
+
         with open(path, 'r') as fp:
-            lines = fp.read().splitlines()
-            fp.close()
+            for line in fp:
+                if not (parts := line.split('#', 1)[0].split()):
+                    continue
+                
+                if (tag := parts[0]) == 'v':
+                    if len(parts) < 4:
+                        raise ValueError(f"Malformed vertex in '{path}'.")
+                    positions.extend(parts[1:4])
+                elif tag == 'f':
+                    corners.extend(parts[1:])
+                    counts.append(len(parts) - 1)
+                    bases.append(len(positions) // 3)
         
-        in_vertices : List[vec3] = []
-        in_indices  : List[Tuple[int, int, int]] = []
+        try:
+            vertices = np.array(positions, dtype=np.float64).reshape(-1, 3)
+        except ValueError:
+            raise ValueError(f"Malformed vertex in '{path}'.") from None
         
-        for line in lines:
-            if line.startswith('v'):
-                in_vertices.append(vec3(*tuple(map(lambda v: float(v), line.split(' ')[1:]))))
-            elif line.startswith('f'):
-                line = map(lambda v: v.split('/')[0], line.split(' ')[1:])
-                in_indices.append(tuple(map(lambda v: int(v), line)))
+        counts = np.array(counts, dtype=np.int64)
+        try:
+            corner = np.array(re.sub(r'/\S*', '', ' '.join(corners)).split(), dtype=np.int64)
+        except ValueError:
+            raise ValueError(f"Malformed face in '{path}'.") from None
+
+        if len(corner) != counts.sum():
+            raise ValueError(f"Malformed face in '{path}'.")
         
-        out_triangles = []
+        corner = np.where(corner < 0, np.repeat(np.array(bases, dtype=np.int64), counts) + corner, corner - 1)
+
+        if len(corner) and (corner.min() < 0 or corner.max() >= len(vertices)):
+            raise ValueError(f"Face index out of range in '{path}'.")
+
+        fans  = np.maximum(counts - 2, 0)
+        face  = np.repeat(np.arange(len(counts)), fans)
+        first = (np.cumsum(counts) - counts)[face]
+        step  = np.arange(len(face)) - np.repeat(np.cumsum(fans) - fans, fans) + 1
+
+        return Mesh(vertices, np.column_stack((corner[first], corner[first + step], corner[first + step + 1])))
+    
+    @staticmethod
+    def read_cache(path : str, key : Tuple[int, int], flags : int = 0) -> Optional['Mesh']:
+        try:
+            with open(path, 'rb') as fp:
+                header = fp.read(MESH_CACHE_HEADER.size)
+                if len(header) != MESH_CACHE_HEADER.size:
+                    return None
+                
+                magic, version, stored, mtime, size, vertex_count, triangle_count, levels = MESH_CACHE_HEADER.unpack(header)
+
+                if magic != MESH_CACHE_MAGIC or version != MESH_CACHE_VERSION or (mtime, size) != key or stored != flags:
+                    return None
+                
+                quantized = bool(flags & MESH_QUANTIZED)
+                offset    = MESH_CACHE_HEADER.size + (128 if quantized else 0)
+                sections  = [(offset, vertex_count, triangle_count, 0.0)]
+                offset   += Mesh.cache_stride(vertex_count, quantized) + Mesh.index_stride(triangle_count)
 
-        for a, b, c in in_indices:
-            out_triangles.append([in_vertices[a - 1], in_vertices[b - 1], in_vertices[c - 1]])
+                for _ in range(levels):
+                    fp.seek(offset)
+                    if len(lod := fp.read(MESH_CACHE_LOD.size)) != MESH_CACHE_LOD.size:
+                        return None
+                    
+                    lod_vertices, lod_triangles, error = MESH_CACHE_LOD.unpack(lod)
+                    offset += MESH_CACHE_LOD.size
+                    sections.append((offset, lod_vertices, lod_triangles, error))
+                    offset += Mesh.cache_stride(lod_vertices, False) + Mesh.index_stride(lod_triangles)
+        except OSError:
+            return None
+        
+        if os.path.getsize(path) != offset:
+            return None
+        
+        dequantize = np.fromfile(path, dtype=np.float64, count=16, offset=MESH_CACHE_HEADER.size) if quantized else None
+        lods       = [Mesh.map_cache(path, *section[:3], dequantize if index == 0 else None) for index, section in enumerate(sections)]
+        for lod, section in zip(lods, sections):
+            lod.error = section[3]
         
-        return Mesh(out_triangles)
+        mesh       = lods[0]
+        mesh.flags = flags
+        if flags & MESH_LODS:
+            mesh._lods = lods
+        return mesh
+    
+    @staticmethod
+    def map_cache(path : str, offset : int, vertex_count : int, triangle_count : int, dequantize : Optional[np.ndarray] = None) -> 'Mesh':
+        quantized = dequantize is not None
+        dtype     = np.uint16 if quantized else np.float64
+        stride    = Mesh.cache_stride(vertex_count, quantized)
+        vertices  = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(vertex_count, 3)) if vertex_count else np.empty((0, 3), dtype=dtype)
+        indices   = np.memmap(path, dtype=np.int32, mode='r', offset=offset + stride, shape=(triangle_count, 3)) if triangle_count else np.empty((0, 3), dtype=np.int32)
+        return Mesh(vertices, indices, dequantize)
+    
+    @staticmethod
+    def cache_stride(vertex_count : int, quantized : bool) -> int:
+        return (vertex_count * 6 + 7) & ~7 if quantized else vertex_count * 24
+    
+    @staticmethod
+    def index_stride(triangle_count : int) -> int:
+        return (triangle_count * 12 + 7) & ~7
+    
+    def write_cache(self, path : str, key : Tuple[int, int]):
+        temporary = f'{path}.{os.getpid()}.tmp'
+        lods      = self.lods[1:] if self.flags & MESH_LODS else []
+
+        try:
+            with open(temporary, 'wb') as fp:
+                fp.write(MESH_CACHE_HEADER.pack(MESH_CACHE_MAGIC, MESH_CACHE_VERSION, self.flags, key[0], key[1], self.vertex_count, self.triangle_count, len(lods)))
+                if self.quantized:
+                    fp.write(self.dequantize.tobytes())
+                fp.write(self.positions.tobytes().ljust(self.cache_stride(self.vertex_count, self.quantized), b'\0'))
+                fp.write(self.indices.tobytes().ljust(self.index_stride(self.triangle_count), b'\0'))
+
+                for lod in lods:
+                    fp.write(MESH_CACHE_LOD.pack(lod.vertex_count, lod.triangle_count, lod.error))
+                    fp.write(lod.positions.tobytes())
+                    fp.write(lod.indices.tobytes().ljust(self.index_stride(lod.triangle_count), b'\0'))
+            os.replace(temporary, path)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
     
     def __str__(self) -> str:
-        return f"(Mesh, {len(self.triangles)} tri(s))"
+        return f"(Mesh, {self.triangle_count} tri(s), {self.vertex_count} vert(s))"
     
     def __repr__(self) -> str:
-        return f"(Mesh, {len(self.triangles)} tri(s))"
\ No newline at end of file
+        return f"(Mesh, {self.triangle_count} tri(s), {self.vertex_count} vert(s))"
\ No newline at end of file
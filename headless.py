@@ -0,0 +1,66 @@
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from world import Camera, Scene, BVH, Framebuffer
+from main import SCENE_PATH, update_scene
+from streaming import load_scene
+from typing import List, Iterator, Optional
+from time import perf_counter
+import pygame.image
+import argparse
+import sys
+
+def render_frames(camera : Camera, scene : Scene, target : Framebuffer, frames : int, delta_time : float, mode : str = 'solid') -> Iterator[int]:
+    bvh = BVH(scene.objects)
+
+    for frame in range(frames):
+        update_scene(camera, scene, delta_time)
+        bvh.refit(*scene.bounds())
+
+        camera.clear(target)
+        camera.render_objects(target, bvh.cull(camera), mode)
+        camera.flush(target)
+
+        yield frame
+
+def save_png(target : Framebuffer, path : str):
+    pygame.image.save(pygame.image.frombuffer(target.to_rgba().tobytes(), target.size, 'RGBA'), path)
+
+def main(argv : Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Render the demo scene offscreen, as fast as possible.')
+    parser.add_argument('--scene',   default=SCENE_PATH, help='JSON scene description')
+    parser.add_argument('--frames',  type=int, default=120, help='number of frames to render')
+    parser.add_argument('--size',    default='800x600', help='framebuffer size as WIDTHxHEIGHT')
+    parser.add_argument('--fps',     type=float, default=60.0, help='simulation rate used for the fixed time step')
+    parser.add_argument('--mode',    choices=('solid', 'wireframe'), default='solid')
+    parser.add_argument('--workers', type=int, default=0, help='rasterizer worker processes (0 renders in-process)')
+    parser.add_argument('--output',  help='PNG path pattern, e.g. frames/frame_%%04d.png')
+    parser.add_argument('--raw',     action='store_true', help='write raw RGBA frames to stdout')
+    args = parser.parse_args(argv)
+
+    size            = tuple(int(v) for v in args.size.lower().split('x'))
+    camera, scene   = load_scene(args.scene, size)
+    target          = Framebuffer.offscreen(size)
+    stdout          = sys.stdout.buffer
+    camera.workers  = args.workers
+
+    if args.output and os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+
+    start = perf_counter()
+
+    try:
+        for frame in render_frames(camera, scene, target, args.frames, 1.0 / args.fps, args.mode):
+            if args.raw:
+                stdout.write(target.to_rgba().data)
+            if args.output:
+                save_png(target, args.output % frame)
+    finally:
+        camera.close()
+
+    elapsed = perf_counter() - start
+    print(f'{args.frames} frame(s) in {elapsed:.3f}s, {args.frames / elapsed:.1f} FPS', file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
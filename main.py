@@ -1,80 +1,77 @@
-from world import Camera, Transform, GameObject, Mesh, vec2, vec3
-from math import sin
-from ctypes import c_uint32, POINTER
+from world import Camera, Scene, BVH
+from profiler import FrameProfiler
+from scheduler import FrameScheduler, ResolutionController
+from streaming import MeshLoader, load_scene
+from typing import Tuple, Optional
 import pygame
 
-size = (800, 600)
+SCENE_PATH = 'scenes/demo.json'
 
-pygame.init()
-surface   = pygame.display.set_mode(size, pygame.RESIZABLE)
-buffer    = (c_uint32 * (size[0] * size[1])).from_address(surface._pixels_address)
-running   = True
-time      = 0.0
-fps_time  = 0.0
+def create_scene(size : Tuple[int, int], loader : Optional[MeshLoader] = None) -> Tuple[Camera, Scene]:
+    return load_scene(SCENE_PATH, size, loader)
 
-clock     = pygame.time.Clock()
-camera    = Camera(Transform.identity(), 120.0, size, 0.001, 1000.0)
+def update_scene(camera : Camera, scene : Scene, delta_time : float):
+    scene.update(delta_time)
 
-objects   = [
-    GameObject(
-        'suzanne',
-        Transform(vec3(0.0, 0.0, -5.0), vec3(0.0, 0.0, 0.0), vec3.one()),
-        Mesh.load_obj('meshes/suzanne.obj'),
-        Transform(vec3.zero(), vec3(0.0, 1.0, 1.0), vec3.zero()),
-        (255, 255, 255)
-    ),
-    GameObject(
-        'suzanne',
-        Transform(vec3(0.0, 0.0, 5.0), vec3(0.0, 0.0, 0.0), vec3.one()),
-        Mesh.load_obj('meshes/suzanne.obj'),
-        Transform(vec3.zero(), vec3(1.0, 1.0, 0.0), vec3.zero()),
-        (255, 255, 255)
-    ),
-    GameObject(
-        'suzanne',
-        Transform(vec3(5.0, 0.0, 0.0), vec3(0.0, 0.0, 0.0), vec3.one()),
-        Mesh.load_obj('meshes/suzanne.obj'),
-        Transform(vec3.zero(), vec3(1.0, 1.0, 0.0), vec3.zero()),
-        (255, 255, 255)
-    ),
-    GameObject(
-        'suzanne',
-        Transform(vec3(-5.0, 0.0, 0.0), vec3(0.0, 0.0, 0.0), vec3.one()),
-        Mesh.load_obj('meshes/suzanne.obj'),
-        Transform(vec3.zero(), vec3(1.0, 1.0, 0.0), vec3.zero()),
-        (255, 255, 255)
-    )
-]
+    camera.transform.rotation.y -= delta_time
+    camera.update()
 
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.VIDEORESIZE:
-            size    = (event.w, event.h)
-            surface = pygame.display.set_mode(size, pygame.RESIZABLE)
-            buffer  = (c_uint32 * (size[0] * size[1])).from_address(surface._pixels_address)
-            camera.resize(size)
+def main():
+    size = (800, 600)
 
-    pygame.display.update()
+    pygame.init()
+    surface   = pygame.display.set_mode(size, pygame.RESIZABLE)
+    running   = True
+    overlay   = False
 
-    delta_time = clock.tick(60) / 1000.0
-    time      += delta_time
+    clock           = pygame.time.Clock()
+    loader          = MeshLoader()
+    camera, scene   = create_scene(size, loader)
+    renderer        = FrameProfiler(name='render')
+    scheduler       = FrameScheduler(camera, scene, surface, bvh=BVH(scene.objects), controller=ResolutionController(1.0 / 60.0), profiler=renderer)
+    profiler        = FrameProfiler(name='main')
 
-    if time >= 5.0:
-        quit(0)
-    
-    fps_time += delta_time
-    if fps_time >= 1.0:
-        print(f'FPS = {clock.get_fps()}')
-        fps_time -= 1.0
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.VIDEORESIZE:
+                size    = (event.w, event.h)
+                surface = pygame.display.set_mode(size, pygame.RESIZABLE)
+                camera.resize(size)
+                scheduler.resize(surface)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                overlay = not overlay
 
-    for obj in objects:
-        obj.update(delta_time)
+        delta_time = clock.tick(60) / 1000.0
 
-    camera.transform.rotation.y -= delta_time
-    camera.update()
+        if scheduler.time >= 5.0:
+            running = False
+        
+        if profiler.report(1.0):
+            renderer.report(0.0)
+        profiler.begin_frame()
+
+        with profiler.scope('update'):
+            if loader.pending:
+                loader.prioritize(camera.transform.position)
+                loader.poll(scene)
+            scheduler.advance(delta_time, lambda step: update_scene(camera, scene, step))
+
+        with profiler.scope('present'):
+            if (region := scheduler.present(surface)) is not None:
+                if overlay:
+                    rect = profiler.draw_overlay(surface)
+                    rect.union_ip(renderer.draw_overlay(surface, (rect.left, rect.bottom + 4)))
+                    scheduler.mark_dirty((rect.left, rect.top, rect.right, rect.bottom))
+                    region.append(rect)
+                pygame.display.update(region)
+                profiler.count('presented')
+
+        profiler.end_frame()
+    
+    scheduler.close()
+    loader.close()
 
-    camera.clear(surface)
-    for obj in objects:
-        obj.render_wireframe(surface, camera)
\ No newline at end of file
+if __name__ == '__main__':
+    main()
\ No newline at end of file
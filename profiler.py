@@ -0,0 +1,114 @@
+from typing import Dict, Iterator, Optional, Tuple
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+import pygame
+import sys
+
+class FrameProfiler:
+    def __init__(self, history : int = 120, name : Optional[str] = None):
+        self.name      = name
+        self.history   : 'deque[Dict]' = deque(maxlen=history)
+        self.timings   : Dict[str, float] = {}
+        self.counters  : Dict[str, int]   = {}
+        self.frames    = 0
+        self.font      = None
+        self._start    = perf_counter()
+        self._lap      = self._start
+        self._logged   = self._start
+        self._begun    = None
+        self._interval = None
+
+    def begin_frame(self):
+        now            = perf_counter()
+        self.timings   = {}
+        self.counters  = {}
+        self._interval = now - self._begun if self._begun is not None else None
+        self._start    = self._lap = self._begun = now
+
+    def end_frame(self) -> Dict:
+        frame = {
+            'time':     perf_counter() - self._start,
+            'interval': self._interval,
+            'timings':  self.timings,
+            'counters': self.counters
+        }
+        self.history.append(frame)
+        self.frames += 1
+        return frame
+
+    def lap(self, stage : Optional[str] = None):
+        now = perf_counter()
+        if stage is not None:
+            self.timings[stage] = self.timings.get(stage, 0.0) + now - self._lap
+        self._lap = now
+
+    @contextmanager
+    def scope(self, name : str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + perf_counter() - start
+
+    def count(self, name : str, value : int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def average(self, frames : Optional[int] = None) -> Dict:
+        history = list(self.history)[-frames:] if frames else list(self.history)
+        if not history:
+            return {'frames': 0, 'ms': 0.0, 'fps': 0.0, 'timings': {}, 'counters': {}}
+
+        timings, counters = {}, {}
+        for frame in history:
+            for name, value in frame['timings'].items():
+                timings[name] = timings.get(name, 0.0) + value
+            for name, value in frame['counters'].items():
+                counters[name] = counters.get(name, 0) + value
+
+        total     = sum(frame['time'] for frame in history)
+        intervals = [frame['interval'] for frame in history if frame.get('interval') is not None]
+        elapsed   = sum(intervals)
+        return {
+            'frames':   len(history),
+            'ms':       total * 1000.0 / len(history),
+            'fps':      len(intervals) / elapsed if elapsed > 0.0 else 0.0,
+            'timings':  {name: value * 1000.0 / len(history) for name, value in timings.items()},
+            'counters': {name: value / len(history) for name, value in counters.items()}
+        }
+
+    def format(self, frames : Optional[int] = None) -> str:
+        average = self.average(frames)
+        return ' | '.join((
+            f"{self.name + ': ' if self.name else ''}{average['fps']:.1f} FPS, {average['ms']:.2f} ms/frame",
+            ' '.join(f'{name} {value:.2f}' for name, value in average['timings'].items()),
+            ' '.join(f'{name} {value:.0f}' for name, value in average['counters'].items())
+        ))
+
+    def report(self, interval : float = 1.0, file = sys.stdout) -> bool:
+        now = perf_counter()
+        if now - self._logged < interval:
+            return False
+
+        print(self.format(), file=file)
+        self._logged = now
+        return True
+
+    def draw_overlay(self, surface, position : Tuple[int, int] = (4, 4), color : Tuple[int, int, int] = (255, 255, 0)) -> pygame.Rect:
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.Font(None, 18)
+
+        x, y = position
+        rect = pygame.Rect(x, y, 0, 0)
+        for line in self.format().split(' | '):
+            text = self.font.render(line, True, color, (0, 0, 0))
+            rect.union_ip(surface.blit(text, (x, y)))
+            y += text.get_height()
+        return rect
+
+    def __str__(self) -> str:
+        return f"<FrameProfiler {len(self.history)}/{self.history.maxlen} frame(s)>"
+
+    def __repr__(self) -> str:
+        return f"<FrameProfiler {len(self.history)}/{self.history.maxlen} frame(s)>"
\ No newline at end of file
@@ -0,0 +1,351 @@
+from typing import Tuple, Optional, List
+from ctypes import c_uint32
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+import weakref
+import sys
+import numpy as np
+
+FRAGMENT_BUDGET = 1 << 22
+TILE_SIZE       = 128
+CLIP_PLANES     = np.array(((0.0, 0.0, 1.0, 1.0), (0.0, 0.0, -1.0, 1.0)))
+
+def grow_capacity(size : Tuple[int, int], capacity : Tuple[int, int] = (0, 0)) -> Tuple[int, int]:
+    return tuple(max(current, -(-wanted // TILE_SIZE) * TILE_SIZE) for wanted, current in zip(size, capacity))
+
+class Framebuffer:
+    def __init__(self, color : np.ndarray, shifts : Tuple[int, int, int, int] = (16, 8, 0, 24), alpha : bool = False, depth : Optional[np.ndarray] = None, size : Optional[Tuple[int, int]] = None):
+        height, width   = color.shape
+        self.base_color = color
+        self.base_depth = depth if depth is not None and depth.shape[0] >= height and depth.shape[1] >= width else np.full(color.shape, np.inf, dtype=np.float64)
+        self.shifts     = shifts
+        self.alpha      = np.uint32(0xFF << shifts[3]) if alpha else np.uint32(0)
+        self.address    = None
+        self.resize(size or (width, height))
+
+    @property
+    def capacity(self) -> Tuple[int, int]:
+        return (self.base_color.shape[1], self.base_color.shape[0])
+
+    def fits(self, size : Tuple[int, int]) -> bool:
+        return size[0] <= self.base_color.shape[1] and size[1] <= self.base_color.shape[0]
+
+    def resize(self, size : Tuple[int, int]):
+        if not self.fits(size):
+            raise ValueError(f"Size {size[0]}x{size[1]} exceeds the framebuffer capacity {self.capacity[0]}x{self.capacity[1]}.")
+
+        width, height = size
+        self.size     = (width, height)
+        self.color    = self.base_color[:height, :width]
+        self.depth    = self.base_depth[:height, :width]
+
+    @staticmethod
+    def from_surface(surface, depth : Optional[np.ndarray] = None) -> 'Framebuffer':
+        if surface.get_bytesize() != 4:
+            raise ValueError("Framebuffer requires a 32-bit surface.")
+
+        width, height = surface.get_size()
+        pitch         = surface.get_pitch() // 4
+        buffer        = (c_uint32 * (pitch * height)).from_address(surface._pixels_address)
+        color         = np.ctypeslib.as_array(buffer).reshape(height, pitch)[:, :width]
+
+        framebuffer         = Framebuffer(color, surface.get_shifts(), surface.get_masks()[3] != 0, depth)
+        framebuffer.address = surface._pixels_address
+        framebuffer.buffer  = buffer
+        return framebuffer
+
+    @staticmethod
+    def offscreen(size : Tuple[int, int], capacity : Optional[Tuple[int, int]] = None) -> 'Framebuffer':
+        width, height = capacity or size
+        return Framebuffer(np.zeros((height, width), dtype=np.uint32), (0, 8, 16, 24), True, size=size)
+
+    def matches(self, surface) -> bool:
+        return self.address == surface._pixels_address and self.size == surface.get_size()
+
+    def pack(self, rgb : np.ndarray) -> np.ndarray:
+        rgb = np.clip(rgb, 0, 255).astype(np.uint32)
+        r, g, b, _ = self.shifts
+        return (rgb[..., 0] << r) | (rgb[..., 1] << g) | (rgb[..., 2] << b) | self.alpha
+
+    def to_rgba(self) -> np.ndarray:
+        if self.shifts[:3] == (0, 8, 16) and self.alpha and sys.byteorder == 'little' and self.color.flags.c_contiguous:
+            return self.color.view(np.uint8).reshape(*self.color.shape, 4)
+
+        r, g, b, _   = self.shifts
+        rgba         = np.empty((*self.color.shape, 4), dtype=np.uint8)
+        rgba[..., 0] = self.color >> r
+        rgba[..., 1] = self.color >> g
+        rgba[..., 2] = self.color >> b
+        rgba[..., 3] = 255
+        return rgba
+
+    def clear(self, rgb : Tuple[int, int, int], rect : Optional[Tuple[int, int, int, int]] = None):
+        if rect is None:
+            self.color.fill(self.pack(np.array(rgb)))
+            self.depth.fill(np.inf)
+            return
+
+        left, top, right, bottom = rect
+        self.color[top:bottom, left:right] = self.pack(np.array(rgb))
+        self.depth[top:bottom, left:right] = np.inf
+
+    def __str__(self) -> str:
+        return f"<Framebuffer {self.size[0]}x{self.size[1]}>"
+
+    def __repr__(self) -> str:
+        return f"<Framebuffer {self.size[0]}x{self.size[1]}>"
+
+def clip_triangles(triangles : np.ndarray, planes : np.ndarray = CLIP_PLANES) -> Tuple[np.ndarray, np.ndarray]:
+    source = np.arange(len(triangles))
+
+    for plane in planes:
+        distance = triangles @ plane
+        inside   = distance >= 0.0
+        count    = inside.sum(axis=1)
+
+        if (whole := count == 3).all():
+            continue
+        
+        partial            = (count == 1) | (count == 2)
+        corners, distance  = triangles[partial], distance[partial]
+        single             = count[partial] == 1
+        odd                = np.where(single, inside[partial].argmax(axis=1), inside[partial].argmin(axis=1))
+        order              = (odd[:, None] + np.arange(3)) % 3
+        corners            = np.take_along_axis(corners, order[:, :, None], axis=1)
+        da, db, dc         = np.take_along_axis(distance, order, axis=1).T
+        a, b, c            = corners[:, 0], corners[:, 1], corners[:, 2]
+
+        ab = a + (b - a) * (da / (da - db))[:, None]
+        ca = a + (c - a) * (da / (da - dc))[:, None]
+
+        triangles = np.concatenate((
+            triangles[whole],
+            np.stack((a, ab, ca), axis=1)[single],
+            np.stack((ab, b, c), axis=1)[~single],
+            np.stack((ab, c, ca), axis=1)[~single]
+        ))
+        partial = source[partial]
+        source  = np.concatenate((source[whole], partial[single], partial[~single], partial[~single]))
+    
+    return triangles, source
+
+def clip_segments(start : np.ndarray, end : np.ndarray, planes : np.ndarray = CLIP_PLANES) -> Tuple[np.ndarray, np.ndarray]:
+    enter = np.zeros(len(start))
+    leave = np.ones(len(start))
+
+    for plane in planes:
+        ds, de = start @ plane, end @ plane
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = ds / (ds - de)
+        
+        enter = np.where(ds < 0.0, np.maximum(enter, t), enter)
+        leave = np.where(de < 0.0, np.minimum(leave, t), leave)
+        leave = np.where((ds < 0.0) & (de < 0.0), -1.0, leave)
+    
+    keep      = enter <= leave
+    direction = (end - start)[keep]
+    start     = start[keep]
+    return start + direction * enter[keep, None], start + direction * leave[keep, None]
+
+def draw_lines(framebuffer : Framebuffer, start : np.ndarray, end : np.ndarray, color : np.uint32) -> int:
+    width, height = framebuffer.size
+    swap          = ((start[:, 0] > end[:, 0]) | ((start[:, 0] == end[:, 0]) & (start[:, 1] > end[:, 1])))[:, None]
+    start, end    = np.where(swap, end, start), np.where(swap, start, end)
+    delta         = end - start
+    enter         = np.zeros(len(start))
+    leave         = np.ones(len(start))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for p, q in ((-delta[:, 0], start[:, 0]), (delta[:, 0], width - start[:, 0]), (-delta[:, 1], start[:, 1]), (delta[:, 1], height - start[:, 1])):
+            t     = q / p
+            enter = np.where(p < 0.0, np.maximum(enter, t), enter)
+            leave = np.where(p > 0.0, np.minimum(leave, t), leave)
+            leave = np.where((p == 0.0) & (q < 0.0), -1.0, leave)
+    
+    keep  = enter <= leave
+    first = np.floor(start[keep] + delta[keep] * enter[keep, None]).astype(np.int64)
+    last  = np.floor(start[keep] + delta[keep] * leave[keep, None]).astype(np.int64)
+    step  = last - first
+    count = np.abs(step).max(axis=1) + 1
+
+    if not (total := int(count.sum())):
+        return 0
+    
+    segment = np.repeat(np.arange(len(count)), count)
+    local   = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+    scale   = local / np.maximum(count - 1, 1)[segment]
+    x       = first[segment, 0] + np.rint(scale * step[segment, 0]).astype(np.int64)
+    y       = first[segment, 1] + np.rint(scale * step[segment, 1]).astype(np.int64)
+    inside  = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+
+    framebuffer.color[y[inside], x[inside]] = color
+    return int(np.count_nonzero(inside))
+
+def rasterize(framebuffer : Framebuffer, triangles : np.ndarray, colors : np.ndarray, rect : Optional[Tuple[int, int, int, int]] = None) -> int:
+    left, top, right, bottom = rect or (0, 0, *framebuffer.size)
+
+    x, y = triangles[:, :, 0], triangles[:, :, 1]
+
+    first  = np.clip(np.ceil(y.min(axis=1) - 0.5), top, bottom)
+    last   = np.clip(np.ceil(y.max(axis=1) - 0.5), top, bottom)
+    width  = np.clip(np.ceil(x.max(axis=1) - 0.5), left, right) - np.clip(np.ceil(x.min(axis=1) - 0.5), left, right)
+    bounds = np.cumsum((last - first) * (width + 1.0))
+
+    filled = 0
+    start  = 0
+
+    while start < len(triangles):
+        base = bounds[start - 1] if start else 0.0
+        end  = max(int(np.searchsorted(bounds, base + FRAGMENT_BUDGET, side='right')), start + 1)
+        filled += _rasterize_chunk(framebuffer, triangles[start:end], colors[start:end], left, top, right, bottom)
+        start   = end
+
+    return filled
+
+def _rasterize_chunk(framebuffer : Framebuffer, triangles : np.ndarray, colors : np.ndarray, left : int, top : int, right : int, bottom : int) -> int:
+    x, y, z = triangles[:, :, 0], triangles[:, :, 1], triangles[:, :, 2]
+
+    ex1, ey1, ez1 = x[:, 1] - x[:, 0], y[:, 1] - y[:, 0], z[:, 1] - z[:, 0]
+    ex2, ey2, ez2 = x[:, 2] - x[:, 0], y[:, 2] - y[:, 0], z[:, 2] - z[:, 0]
+    area          = ex1 * ey2 - ex2 * ey1
+
+    if not (valid := area != 0.0).all():
+        x, y, z, colors = x[valid], y[valid], z[valid], colors[valid]
+        ex1, ey1, ez1, ex2, ey2, ez2, area = ex1[valid], ey1[valid], ez1[valid], ex2[valid], ey2[valid], ez2[valid], area[valid]
+
+    dzdx = (ez1 * ey2 - ez2 * ey1) / area
+    dzdy = (ex1 * ez2 - ex2 * ez1) / area
+
+    first = np.clip(np.ceil(y.min(axis=1) - 0.5), top, bottom).astype(np.int64)
+    last  = np.clip(np.ceil(y.max(axis=1) - 0.5), top, bottom).astype(np.int64)
+    rows  = last - first
+
+    if not (row_count := int(rows.sum())):
+        return 0
+
+    row_triangle = np.repeat(np.arange(len(rows)), rows)
+    row          = np.arange(row_count) - np.repeat(np.cumsum(rows) - rows, rows) + first[row_triangle]
+    center       = row + 0.5
+
+    ax, ay = x[row_triangle], y[row_triangle]
+    bx, by = np.roll(ax, -1, axis=1), np.roll(ay, -1, axis=1)
+    cross  = (ay <= center[:, None]) != (by <= center[:, None])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        edge_x = ax + (center[:, None] - ay) * (bx - ax) / (by - ay)
+
+    span_start = np.clip(np.ceil(np.where(cross, edge_x,  np.inf).min(axis=1) - 0.5), left, right).astype(np.int64)
+    span_end   = np.clip(np.ceil(np.where(cross, edge_x, -np.inf).max(axis=1) - 0.5), left, right).astype(np.int64)
+    spans      = np.maximum(span_end - span_start, 0)
+
+    if not (fragment_count := int(spans.sum())):
+        return 0
+
+    row_dzdx  = dzdx[row_triangle]
+    row_depth = z[row_triangle, 0] + row_dzdx * (0.5 - x[row_triangle, 0]) + dzdy[row_triangle] * (center - y[row_triangle, 0])
+
+    fragment_span = np.repeat(np.arange(row_count), spans)
+    fragment_x    = np.arange(fragment_count) - np.repeat(np.cumsum(spans) - spans, spans) + span_start[fragment_span]
+    fragment_y    = row[fragment_span]
+    fragment_z    = row_depth[fragment_span] + row_dzdx[fragment_span] * fragment_x
+
+    depth = framebuffer.base_depth.reshape(-1)
+    pixel = fragment_y * framebuffer.base_depth.shape[1] + fragment_x
+
+    if not (visible := fragment_z < depth[pixel]).all():
+        fragment_span, fragment_x, fragment_y, fragment_z, pixel = fragment_span[visible], fragment_x[visible], fragment_y[visible], fragment_z[visible], pixel[visible]
+
+    np.minimum.at(depth, pixel, fragment_z)
+    nearest = fragment_z == depth[pixel]
+
+    framebuffer.color[fragment_y[nearest], fragment_x[nearest]] = colors[row_triangle[fragment_span[nearest]]]
+    return int(np.count_nonzero(nearest))
+
+class TileRasterizer:
+    def __init__(self, size : Tuple[int, int], shifts : Tuple[int, int, int, int], alpha : bool, workers : int, tile_size : int = TILE_SIZE, capacity : Optional[Tuple[int, int]] = None):
+        capacity       = capacity or size
+        self.workers   = workers
+        self.tile_size = tile_size
+        self.memory    = SharedMemory(create=True, size=capacity[0] * capacity[1] * 12)
+        self.pool      = Pool(workers, initializer=_attach_worker, initargs=(self.memory.name, capacity, shifts, alpha))
+
+        self.framebuffer = _shared_framebuffer(self.memory, capacity, shifts, alpha)
+        self._finalizer  = weakref.finalize(self, TileRasterizer._release, self.pool, self.memory)
+        self.resize(size)
+
+    def resize(self, size : Tuple[int, int]):
+        self.framebuffer.resize(size)
+        self.size  = size
+        self.tiles = ((size[0] + self.tile_size - 1) // self.tile_size, (size[1] + self.tile_size - 1) // self.tile_size)
+
+    def draw(self, triangles : np.ndarray, colors : np.ndarray) -> int:
+        if not len(triangles):
+            return 0
+
+        tasks = self.bin(triangles, colors)
+        return sum(self.pool.map(_rasterize_tile, tasks, chunksize=max(1, len(tasks) // (self.workers * 4))))
+
+    def bin(self, triangles : np.ndarray, colors : np.ndarray) -> List[Tuple[Tuple[int, int, int, int], np.ndarray, np.ndarray]]:
+        width, height = self.size
+        tile_size     = self.tile_size
+        x, y          = triangles[:, :, 0], triangles[:, :, 1]
+
+        with np.errstate(invalid='ignore'):
+            left   = np.clip(x.min(axis=1), 0, width  - 1).astype(np.int64) // tile_size
+            right  = np.clip(x.max(axis=1), 0, width  - 1).astype(np.int64) // tile_size
+            top    = np.clip(y.min(axis=1), 0, height - 1).astype(np.int64) // tile_size
+            bottom = np.clip(y.max(axis=1), 0, height - 1).astype(np.int64) // tile_size
+
+        columns = right - left + 1
+        counts  = columns * (bottom - top + 1)
+
+        triangle = np.repeat(np.arange(len(triangles)), counts)
+        local    = np.arange(len(triangle)) - np.repeat(np.cumsum(counts) - counts, counts)
+        tile     = (top[triangle] + local // columns[triangle]) * self.tiles[0] + left[triangle] + local % columns[triangle]
+
+        order          = np.argsort(tile, kind='stable')
+        tile, triangle = tile[order], triangle[order]
+        tiles, starts  = np.unique(tile, return_index=True)
+        ends           = np.append(starts[1:], len(tile))
+
+        tasks = []
+        for index, start, end in zip(tiles.tolist(), starts.tolist(), ends.tolist()):
+            tx, ty = (index % self.tiles[0]) * tile_size, (index // self.tiles[0]) * tile_size
+            subset = triangle[start:end]
+            tasks.append(((tx, ty, min(tx + tile_size, width), min(ty + tile_size, height)), triangles[subset], colors[subset]))
+        return tasks
+
+    def close(self):
+        self._finalizer()
+
+    @staticmethod
+    def _release(pool, memory : SharedMemory):
+        pool.terminate()
+        memory.close()
+        memory.unlink()
+
+    def __str__(self) -> str:
+        return f"<TileRasterizer {self.size[0]}x{self.size[1]}, {self.tiles[0]}x{self.tiles[1]} tiles, {self.workers} worker(s)>"
+
+    def __repr__(self) -> str:
+        return f"<TileRasterizer {self.size[0]}x{self.size[1]}, {self.tiles[0]}x{self.tiles[1]} tiles, {self.workers} worker(s)>"
+
+_worker_memory      : Optional[SharedMemory] = None
+_worker_framebuffer : Optional[Framebuffer]  = None
+
+def _shared_framebuffer(memory : SharedMemory, size : Tuple[int, int], shifts : Tuple[int, int, int, int], alpha : bool) -> Framebuffer:
+    width, height = size
+    depth         = np.ndarray((height, width), dtype=np.float64, buffer=memory.buf)
+    color         = np.ndarray((height, width), dtype=np.uint32, buffer=memory.buf, offset=width * height * 8)
+    return Framebuffer(color, shifts, alpha, depth)
+
+def _attach_worker(name : str, size : Tuple[int, int], shifts : Tuple[int, int, int, int], alpha : bool):
+    global _worker_memory, _worker_framebuffer
+
+    _worker_memory      = SharedMemory(name=name)
+    _worker_framebuffer = _shared_framebuffer(_worker_memory, size, shifts, alpha)
+
+def _rasterize_tile(task : Tuple[Tuple[int, int, int, int], np.ndarray, np.ndarray]) -> int:
+    rect, triangles, colors = task
+    return rasterize(_worker_framebuffer, triangles, colors, rect)
@@ -0,0 +1,328 @@
+from world import Camera, Transform, Scene, BVH, Framebuffer, Mesh, vec3
+from profiler import FrameProfiler
+from raster import grow_capacity
+from typing import Callable, Dict, List, Optional, Tuple
+from threading import Thread, Condition
+from time import perf_counter
+import numpy as np
+import pygame
+
+class FrameSnapshot:
+    __slots__ = ('frame', 'time', 'position', 'rotation', 'batches', 'occluders')
+
+    def __init__(self, frame : int, time : float, position : Tuple[float, float, float], rotation : Tuple[float, float, float], batches : List[Tuple[Mesh, np.ndarray, np.ndarray]], occluders : int = 0):
+        self.frame     = frame
+        self.time      = time
+        self.position  = position
+        self.rotation  = rotation
+        self.batches   = batches
+        self.occluders = occluders
+    
+    @staticmethod
+    def capture(frame : int, time : float, camera : Camera, scene : Scene, bvh : Optional[BVH] = None) -> 'FrameSnapshot':
+        objects = scene.objects
+        if bvh is not None:
+            bvh.refit(*scene.bounds())
+            objects = bvh.cull(camera)
+        else:
+            scene.refresh()
+        groups  : Dict[Tuple[bool, int], Tuple[Mesh, List[int], List[Tuple[int, int, int]]]] = {}
+
+        for obj in sorted(objects, key=lambda obj: not obj.occluder):
+            if obj.mesh is None:
+                continue
+            group = groups.setdefault((obj.occluder, id(obj.mesh)), (obj.mesh, [], []))
+            group[1].append(obj.transform.index)
+            group[2].append(obj.color)
+        
+        batches   = []
+        occluders = 0
+        for (occluder, _), (mesh, indices, colors) in groups.items():
+            indices        = np.array(indices, dtype=np.int64)
+            models, colors = scene.models.data[indices], np.array(colors, dtype=np.float64)
+            models.flags.writeable = colors.flags.writeable = False
+
+            if camera.lod_error is None or len(mesh.lods) == 1:
+                batches.append((mesh, models, colors))
+            else:
+                levels = scene.levels[indices] = camera.select_lods(mesh, *scene.spheres(indices), scene.levels[indices])
+                for level in np.unique(levels).tolist():
+                    selected = levels == level
+                    batches.append((mesh.lods[level], models[selected], colors[selected]))
+            
+            if occluder:
+                occluders = len(batches)
+        
+        position, rotation = camera.transform.position, camera.transform.rotation
+        return FrameSnapshot(frame, time, (position.x, position.y, position.z), (rotation.x, rotation.y, rotation.z), batches, occluders)
+    
+    def __str__(self) -> str:
+        return f"<FrameSnapshot {self.frame}, {len(self.batches)} batch(es)>"
+    
+    def __repr__(self) -> str:
+        return f"<FrameSnapshot {self.frame}, {len(self.batches)} batch(es)>"
+
+class FrameSlot:
+    SETTINGS   = ('ambient', 'backface_culling', 'workers', 'occlusion_culling', 'hiz_block', 'lod_error', 'lod_hysteresis', 'dirty_rects', 'dirty_limit')
+    PROJECTION = ('fov', 'clip_near', 'clip_far')
+
+    def __init__(self, camera : Camera):
+        self.camera      = Camera(Transform.identity(), camera.fov, camera.size, camera.clip_near, camera.clip_far, camera.workers)
+        self.surface     = None
+        self.framebuffer = None
+        self.configure(camera)
+    
+    def configure(self, camera : Camera):
+        for setting in self.SETTINGS:
+            setattr(self.camera, setting, getattr(camera, setting))
+        
+        if any(getattr(self.camera, setting) != getattr(camera, setting) for setting in self.PROJECTION):
+            for setting in self.PROJECTION:
+                setattr(self.camera, setting, getattr(camera, setting))
+            self.camera.update_projection()
+    
+    def resize(self, display, size : Tuple[int, int]):
+        framebuffer = self.framebuffer
+
+        if framebuffer is None or not framebuffer.fits(size) or self.surface.get_shifts() != display.get_shifts():
+            capacity     = grow_capacity(size, framebuffer.capacity if framebuffer is not None else (0, 0))
+            self.surface = pygame.Surface(capacity, 0, display)
+            framebuffer  = self.framebuffer = Framebuffer.from_surface(self.surface, framebuffer.base_depth if framebuffer is not None else None)
+        
+        framebuffer.resize(size)
+        self.camera.resize(size)
+    
+    def view(self):
+        return self.surface.subsurface((0, 0, *self.framebuffer.size))
+    
+    def __str__(self) -> str:
+        return f"<FrameSlot {self.framebuffer.size[0]}x{self.framebuffer.size[1]} of {self.framebuffer.capacity[0]}x{self.framebuffer.capacity[1]}>"
+    
+    def __repr__(self) -> str:
+        return f"<FrameSlot {self.framebuffer.size[0]}x{self.framebuffer.size[1]} of {self.framebuffer.capacity[0]}x{self.framebuffer.capacity[1]}>"
+
+class ResolutionController:
+    def __init__(self, target : float, minimum : float = 0.5, maximum : float = 1.0, increment : float = 0.05, headroom : float = 0.8, smoothing : float = 0.2):
+        self.target    = target
+        self.minimum   = minimum
+        self.maximum   = maximum
+        self.increment = increment
+        self.headroom  = headroom
+        self.smoothing = smoothing
+        self.scale     = maximum
+        self.average   = None
+    
+    def update(self, frame_time : float) -> float:
+        self.average = frame_time if self.average is None else self.average + (frame_time - self.average) * self.smoothing
+
+        if self.target * self.headroom <= self.average <= self.target:
+            return self.scale
+        
+        desired = self.scale * (self.target * (1.0 + self.headroom) * 0.5 / self.average) ** 0.5
+        desired = round(min(max(desired, self.minimum), self.maximum) / self.increment) * self.increment
+
+        if abs(desired - self.scale) >= self.increment * 0.5:
+            self.scale   = desired
+            self.average = None
+        return self.scale
+    
+    def __str__(self) -> str:
+        return f"<ResolutionController scale={self.scale:.2f}, target={self.target * 1000.0:.1f}ms>"
+    
+    def __repr__(self) -> str:
+        return f"<ResolutionController scale={self.scale:.2f}, target={self.target * 1000.0:.1f}ms>"
+
+class FrameScheduler:
+    def __init__(self, camera : Camera, scene : Scene, surface, step : float = 1.0 / 60.0, max_steps : int = 5, mode : str = 'solid', bvh : Optional[BVH] = None, render_scale : float = 1.0, controller : Optional[ResolutionController] = None, profiler : Optional[FrameProfiler] = None):
+        self.camera       = camera
+        self.scene        = scene
+        self.bvh          = bvh
+        self.step         = step
+        self.max_steps    = max_steps
+        self.mode         = mode
+        self.render_scale = controller.scale if controller is not None else render_scale
+        self.controller   = controller
+        self.profiler     = profiler
+        self.time         = 0.0
+        self.frame        = 0
+        self.accumulator  = 0.0
+        self.presented    = 0
+        self.dropped      = 0
+        self.render_time  = 0.0
+        self.condition    = Condition()
+        self.pending      : Optional[FrameSnapshot] = None
+        self.finished     = None
+        self.slots        = [FrameSlot(camera) for _ in range(2)]
+        self.free         = list(self.slots)
+        self.display      = None
+        self.internal     = None
+        self.shown        : Optional[List[Tuple[int, int, int, int]]] = None
+        self.running      = True
+        self.error        : Optional[Exception] = None
+        self.resize(surface)
+
+        for slot in self.slots:
+            slot.resize(surface, self.internal)
+
+        self.thread = Thread(target=self.render_loop, name='render', daemon=True)
+        self.thread.start()
+    
+    def resize(self, surface):
+        size = surface.get_size()
+
+        with self.condition:
+            self.display  = surface
+            self.internal = (max(1, int(size[0] * self.render_scale)), max(1, int(size[1] * self.render_scale)))
+            self.shown    = None
+    
+    def set_render_scale(self, scale : float):
+        if scale != self.render_scale:
+            self.render_scale = scale
+            self.resize(self.display)
+    
+    def advance(self, elapsed : float, update : Callable[[float], None]) -> int:
+        self.check()
+        self.accumulator = min(self.accumulator + elapsed, self.step * self.max_steps)
+        steps = 0
+
+        while self.accumulator >= self.step:
+            update(self.step)
+            self.accumulator -= self.step
+            self.time        += self.step
+            steps            += 1
+        
+        if steps:
+            self.submit()
+        return steps
+    
+    def submit(self):
+        snapshot = FrameSnapshot.capture(self.frame, self.time, self.camera, self.scene, self.bvh)
+        self.frame += 1
+
+        with self.condition:
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = snapshot
+            self.condition.notify_all()
+    
+    def render_loop(self):
+        while True:
+            with self.condition:
+                while self.running and (self.pending is None or not self.free):
+                    self.condition.wait()
+                
+                if not self.running:
+                    return
+                
+                snapshot, self.pending = self.pending, None
+                slot              = self.free.pop()
+                display, internal = self.display, self.internal
+            
+            start = perf_counter()
+            try:
+                if slot.framebuffer.size != internal or slot.surface.get_shifts() != display.get_shifts():
+                    slot.resize(display, internal)
+                drawn = self.render(slot, snapshot)
+            except Exception as exception:
+                with self.condition:
+                    self.error = exception
+                    self.free.append(slot)
+                    self.condition.notify_all()
+                return
+
+            with self.condition:
+                self.render_time = perf_counter() - start
+                if self.finished is not None:
+                    self.free.append(self.finished[0])
+                    self.dropped += 1
+                self.finished = (slot, snapshot, drawn)
+                self.condition.notify_all()
+    
+    def render(self, slot : FrameSlot, snapshot : FrameSnapshot) -> Optional[List[Tuple[int, int, int, int]]]:
+        target, camera = slot.framebuffer, slot.camera
+        camera.profiler = self.profiler
+        slot.configure(self.camera)
+        if self.profiler is not None:
+            self.profiler.begin_frame()
+        
+        camera.transform.position = vec3(*snapshot.position)
+        camera.transform.rotation = vec3(*snapshot.rotation)
+        camera.update()
+        camera.clear(target)
+
+        for index, (mesh, models, colors) in enumerate(snapshot.batches):
+            if index == snapshot.occluders and index and camera.occlusion_culling and self.mode == 'solid':
+                camera.build_occlusion(target)
+            
+            if self.mode == 'solid':
+                camera.render_instanced_solid(target, mesh, models, colors)
+            else:
+                camera.render_instanced_wireframe(target, mesh, models)
+        
+        camera.flush(target)
+        
+        if self.profiler is not None:
+            self.profiler.end_frame()
+        return None if camera.drawn is None else list(camera.drawn)
+    
+    def present(self, surface) -> Optional[List[Tuple[int, int, int, int]]]:
+        if surface is not self.display:
+            self.resize(surface)
+        
+        self.check()
+
+        with self.condition:
+            if self.finished is None:
+                return None
+            slot, snapshot, drawn = self.finished
+            self.finished = None
+            render_time   = self.render_time
+        
+        size = surface.get_size()
+        if slot.framebuffer.size != size:
+            pygame.transform.scale(slot.view(), size, surface)
+            region, drawn = [(0, 0, *size)], None
+        elif self.shown is None or drawn is None:
+            surface.blit(slot.view(), (0, 0))
+            region = [(0, 0, *size)]
+        else:
+            region = [(left, top, right - left, bottom - top) for left, top, right, bottom in Camera.merge_rects(self.shown + drawn)]
+            view   = slot.view()
+            for rect in region:
+                surface.blit(view, rect[:2], rect)
+        
+        self.shown      = drawn
+        self.presented += 1
+
+        with self.condition:
+            self.free.append(slot)
+            self.condition.notify_all()
+        
+        if self.controller is not None:
+            self.set_render_scale(self.controller.update(render_time))
+        return region
+    
+    def check(self):
+        with self.condition:
+            error = self.error
+        if error is not None:
+            raise error
+    
+    def mark_dirty(self, rect : Tuple[int, int, int, int]):
+        if self.shown is not None:
+            self.shown.append(rect)
+    
+    def close(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join()
+
+        for slot in self.slots:
+            slot.camera.close()
+    
+    def __str__(self) -> str:
+        return f"<FrameScheduler frame {self.frame}, {self.presented} presented, {self.dropped} dropped, scale {self.render_scale:.2f}>"
+    
+    def __repr__(self) -> str:
+        return f"<FrameScheduler frame {self.frame}, {self.presented} presented, {self.dropped} dropped, scale {self.render_scale:.2f}>"
\ No newline at end of file
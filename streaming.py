@@ -0,0 +1,168 @@
+from world import Camera, Transform, GameObject, Scene, Mesh, vec3
+from assets import MeshCache, mesh_cache
+from typing import Dict, List, Optional, Tuple
+from threading import Thread, Condition
+import heapq
+import json
+import os
+
+class MeshLoader:
+    def __init__(self, cache : MeshCache = mesh_cache, workers : int = 2):
+        self.cache     = cache
+        self.condition = Condition()
+        self.queue     : List[Tuple[float, int, str]] = []
+        self.waiting   : Dict[str, List[GameObject]] = {}
+        self.loading   = set()
+        self.ready     : List[Tuple[str, Optional[Mesh], Optional[Exception]]] = []
+        self.failed    : Dict[str, Exception] = {}
+        self.requests  = 0
+        self.loaded    = 0
+        self.running   = True
+        self.threads   = [Thread(target=self.work, name=f'loader-{index}', daemon=True) for index in range(workers)]
+
+        for thread in self.threads:
+            thread.start()
+
+    def request(self, obj : GameObject, path : str, priority : float = 0.0):
+        key = os.path.realpath(path)
+
+        with self.condition:
+            if key in self.waiting:
+                self.waiting[key].append(obj)
+                return
+
+            self.waiting[key] = [obj]
+            self.requests    += 1
+            heapq.heappush(self.queue, (priority, self.requests, key))
+            self.condition.notify()
+
+    def prioritize(self, position : vec3):
+        with self.condition:
+            if not self.queue:
+                return
+
+            origin     = (position.x, position.y, position.z)
+            self.queue = [(min(self.distance(obj, origin) for obj in self.waiting[key]), order, key) for _, order, key in self.queue]
+            heapq.heapify(self.queue)
+
+    @staticmethod
+    def distance(obj : GameObject, origin : Tuple[float, float, float]) -> float:
+        position = obj.transform.position
+        return ((position.x - origin[0]) ** 2 + (position.y - origin[1]) ** 2 + (position.z - origin[2]) ** 2) ** 0.5
+
+    def work(self):
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+
+                if not self.running:
+                    return
+
+                _, _, key = heapq.heappop(self.queue)
+                self.loading.add(key)
+
+            mesh, error = None, None
+            try:
+                mesh = self.cache.acquire(key)
+            except Exception as exception:
+                error = exception
+            finally:
+                with self.condition:
+                    self.loading.discard(key)
+                    self.ready.append((key, mesh, error))
+                    self.condition.notify_all()
+
+    def poll(self, scene : Optional[Scene] = None) -> int:
+        with self.condition:
+            ready, self.ready = self.ready, []
+            waiting = [self.waiting.pop(key) for key, _, _ in ready]
+
+        attached = 0
+        for (key, mesh, error), objects in zip(ready, waiting):
+            if mesh is None:
+                self.failed[key] = error
+                continue
+
+            for obj in objects:
+                if scene is not None and obj not in scene:
+                    continue
+                mesh = self.cache.acquire(key)
+                if scene is not None:
+                    scene.attach(obj, mesh, key, self.cache)
+                else:
+                    obj.assign(mesh, key, self.cache)
+                attached += 1
+            self.cache.release(key)
+            self.loaded += 1
+        return attached
+
+    def wait(self, scene : Optional[Scene] = None) -> int:
+        with self.condition:
+            while self.queue or self.loading:
+                self.condition.wait()
+        return self.poll(scene)
+
+    @property
+    def pending(self) -> int:
+        with self.condition:
+            return len(self.queue) + len(self.loading) + len(self.ready)
+
+    def close(self):
+        with self.condition:
+            self.running = False
+            self.queue.clear()
+            self.condition.notify_all()
+
+        for thread in self.threads:
+            thread.join()
+
+    def __str__(self) -> str:
+        return f"<MeshLoader {self.loaded} loaded, {self.pending} pending, {len(self.failed)} failed>"
+
+    def __repr__(self) -> str:
+        return f"<MeshLoader {self.loaded} loaded, {self.pending} pending, {len(self.failed)} failed>"
+
+def read_vector(data : Dict, key : str, default : Tuple[float, float, float]) -> vec3:
+    values = data.get(key, default)
+    if len(values) != 3:
+        raise ValueError(f"Expected 3 components for '{key}', got {len(values)}.")
+    return vec3(*(float(value) for value in values))
+
+def load_scene(path : str, size : Tuple[int, int], loader : Optional[MeshLoader] = None) -> Tuple[Camera, Scene]:
+    with open(path, 'r') as fp:
+        data = json.load(fp)
+
+    root   = os.path.dirname(os.path.abspath(path))
+    view   = data.get('camera', {})
+    camera = Camera(
+        Transform(read_vector(view, 'position', (0.0, 0.0, 0.0)), read_vector(view, 'rotation', (0.0, 0.0, 0.0)), vec3.one()),
+        float(view.get('fov', 120.0)),
+        size,
+        float(view.get('near', 0.001)),
+        float(view.get('far', 1000.0))
+    )
+
+    objects : List[Tuple[GameObject, str]] = []
+    for entry in data.get('objects', ()):
+        bias = entry.get('bias', {})
+        obj  = GameObject(
+            entry.get('name', 'object'),
+            Transform(read_vector(entry, 'position', (0.0, 0.0, 0.0)), read_vector(entry, 'rotation', (0.0, 0.0, 0.0)), read_vector(entry, 'scale', (1.0, 1.0, 1.0))),
+            None,
+            Transform(read_vector(bias, 'position', (0.0, 0.0, 0.0)), read_vector(bias, 'rotation', (0.0, 0.0, 0.0)), read_vector(bias, 'scale', (0.0, 0.0, 0.0))),
+            tuple(int(channel) for channel in entry.get('color', (255, 255, 255))),
+            bool(entry.get('occluder', False))
+        )
+        objects.append((obj, os.path.join(root, entry['mesh'])))
+
+    if loader is None:
+        for obj, mesh in objects:
+            obj.assign(mesh_cache.acquire(mesh), mesh, mesh_cache)
+        return camera, Scene([obj for obj, _ in objects])
+
+    scene  = Scene([obj for obj, _ in objects])
+    origin = camera.transform.position
+    for obj, mesh in objects:
+        loader.request(obj, mesh, MeshLoader.distance(obj, (origin.x, origin.y, origin.z)))
+    return camera, scene
\ No newline at end of file
@@ -1,25 +1,77 @@
-from esai import vec2, vec3, vec4, mat4, Mesh, homogeneous_to_cartesian, cartesian_to_homogeneous
+from esai import vec2, vec3, vec4, mat4, vec3_array, mat4_array, Mesh, homogeneous_to_cartesian, cartesian_to_homogeneous
+from assets import MeshCache
+from profiler import FrameProfiler
+from raster import Framebuffer, TileRasterizer, grow_capacity, rasterize, draw_lines, clip_triangles, clip_segments
 from math import pi
-from typing import Tuple, List
+from typing import Tuple, List, Sequence, Union, Optional
+import numpy as np
 import pygame.draw as draw
 from threading import Thread
 
 class Transform:
     def __init__(self, position : vec3, rotation : vec3, scale : vec3):
-        self.position = position
-        self.rotation = rotation
-        self.scale    = scale
+        self.position   = position
+        self.rotation   = rotation
+        self.scale      = scale
+        self.version    = 0
+        self.view_cache = None
+        self._key       = None
+        self._model     = None
+        self._array     = None
+        self._inverse   = None
+        self._sphere    = None
+        self.lod        = None
+    
+    def refresh(self) -> bool:
+        position, rotation, scale = self.position, self.rotation, self.scale
+        key = (position.x, position.y, position.z, rotation.x, rotation.y, rotation.z, scale.x, scale.y, scale.z)
+
+        if key == self._key:
+            return False
+        
+        matrix = mat4.translation(position)
+
+        if (rotation.x != 0.0): matrix @= mat4.rotation_x(rotation.x)
+        if (rotation.y != 0.0): matrix @= mat4.rotation_y(rotation.y)
+        if (rotation.z != 0.0): matrix @= mat4.rotation_z(rotation.z)
+        if scale.x != 1.0 or scale.y != 1.0 or scale.z != 1.0:
+            matrix @= mat4.scale(scale)
+        
+        self._key      = key
+        self._model    = matrix
+        self._array    = None
+        self._inverse  = None
+        self.version  += 1
+        return True
     
     def get_model_view(self) -> mat4:
-        matrix = mat4.translation(self.position)
+        self.refresh()
+        return self._model
+    
+    def get_model_array(self) -> np.ndarray:
+        self.refresh()
+        if self._array is None:
+            self._array = self._model.to_array()
+        return self._array
+    
+    def get_world_sphere(self, mesh : Mesh) -> Tuple[np.ndarray, float]:
+        model = self.get_model_array()
 
-        if (self.rotation.x != 0.0): matrix @= mat4.rotation_x(self.rotation.x)
-        if (self.rotation.y != 0.0): matrix @= mat4.rotation_y(self.rotation.y)
-        if (self.rotation.z != 0.0): matrix @= mat4.rotation_z(self.rotation.z)
-        if self.scale.x != 1.0 or self.scale.y != 1.0 or self.scale.z != 1.0:
-            matrix @= mat4.scale(self.scale)
+        if (cache := self._sphere) is None or cache[0] is not mesh or cache[1] != self.version:
+            center, radius = mesh.sphere
+            cache = self._sphere = (
+                mesh, self.version,
+                model[:3, :3] @ center + model[:3, 3],
+                radius * float(np.sqrt((model[:3, :3] ** 2).sum(axis=0).max()))
+            )
         
-        return matrix
+        return cache[2], cache[3]
+    
+    def get_inverse_model_view(self) -> mat4:
+        self.refresh()
+        if self._inverse is None:
+            self._inverse = self._model.invert_affine()
+        return self._inverse
     
     @staticmethod
     def identity() -> 'Transform':
@@ -36,19 +88,44 @@ class Transform:
         return f"Transform({repr(self.position)}, {repr(self.rotation)}, {repr(self.scale)})"
 
 class Camera:
-    def __init__(self, transform : Transform, fov : float, size : Tuple[int, int], clip_near : float, clip_far : float):
+    def __init__(self, transform : Transform, fov : float, size : Tuple[int, int], clip_near : float, clip_far : float, workers : int = 0):
         self.transform   = transform
         self.fov         = fov
         self.size        = size
         self.half_size   = (size[0] // 2, size[1] // 2)
         self.clip_near   = clip_near
         self.clip_far    = clip_far
+        self.ambient     = 0.15
+        self.backface_culling = False
         self.view_matrix = mat4.identity()
+        self.version     = 0
+        self.framebuffer = None
+        self.workers     = workers
+        self.tiles       = None
+        self.pending     = []
+        self.stats       = dict.fromkeys(('objects', 'culled', 'occluded'), 0)
+        self.occlusion_culling = True
+        self.hiz_block   = 8
+        self.hiz         : Optional[List[np.ndarray]] = None
+        self.profiler    : Optional[FrameProfiler] = None
+        self.lod_error   = 2.0
+        self.lod_hysteresis = 0.25
+        self.dirty_rects = True
+        self.dirty_limit = 0.5
+        self.drawn       : Optional[List[Tuple[int, int, int, int]]] = None
+        self.damage      : Optional[List[Tuple[int, int, int, int]]] = None
+        self._dirty_target = None
+        self._view_key   = None
         self.update_projection()
         self.update()
     
     def update(self):
-        self.view_matrix = self.transform.get_model_view().invert()
+        self.transform.refresh()
+
+        if self._view_key != (key := (id(self.transform), self.transform.version)):
+            self._view_key   = key
+            self.view_matrix = self.transform.get_inverse_model_view()
+            self.update_view_projection()
 
     def update_projection(self):
         self.projection_matrix = mat4.projection(
@@ -56,7 +133,163 @@ class Camera:
             min(self.size) / max(self.size),
             self.clip_far, self.clip_near
         )
+        self.projection_array = self.projection_matrix.to_array()
         self.clip = (self.clip_far - self.clip_near) / 2.0 + self.clip_near
+        self.update_view_projection()
+    
+    def update_view_projection(self):
+        self.view_array      = self.view_matrix.to_array()
+        self.view_projection = self.projection_matrix @ self.view_matrix
+        self.view_projection_array = self.view_projection.to_array()
+        self.frustum         = self.extract_frustum()
+        self.version        += 1
+    
+    def extract_frustum(self) -> np.ndarray:
+        m      = self.view_projection_array
+        planes = np.array((m[3] + m[0], m[3] - m[0], m[3] + m[1], m[3] - m[1], m[3] + m[2], m[3] - m[2]))
+        return planes / np.linalg.norm(planes[:, :3], axis=1)[:, None]
+    
+    def is_sphere_visible(self, center : np.ndarray, radius : float) -> bool:
+        return bool(((self.frustum[:, :3] @ center + self.frustum[:, 3]) >= -radius).all())
+    
+    def cull_spheres(self, centers : np.ndarray, radii : np.ndarray) -> np.ndarray:
+        return ((centers @ self.frustum[:, :3].T + self.frustum[:, 3]) >= -radii[:, None]).all(axis=1)
+    
+    def cull(self, transform : Transform, mesh : Mesh) -> bool:
+        self.stats['objects'] += 1
+        self.count('objects')
+
+        if not self.is_sphere_visible(*transform.get_world_sphere(mesh)):
+            self.stats['culled'] += 1
+            self.count('culled')
+            return True
+        
+        if self.hiz is not None and self.occluded(mesh, transform.get_model_array()[None])[0]:
+            self.stats['occluded'] += 1
+            self.count('occluded')
+            return True
+        return False
+    
+    def build_occlusion(self, surface):
+        framebuffer = self.get_framebuffer(surface)
+        if self.workers:
+            self.draw_pending(framebuffer)
+            framebuffer = self.tiles.framebuffer
+        
+        self.lap()
+        block  = self.hiz_block
+        level  = self.reduce_depth(framebuffer.depth, block)
+        levels = [level]
+        while max(level.shape) > 1:
+            level = self.reduce_depth(level, 2)
+            levels.append(level)
+        self.hiz = levels
+        self.lap('occlusion')
+    
+    @staticmethod
+    def reduce_depth(depth : np.ndarray, factor : int) -> np.ndarray:
+        height, width = -(-depth.shape[0] // factor), -(-depth.shape[1] // factor)
+        padded        = np.full((height * factor, width * factor), np.inf)
+        padded[:depth.shape[0], :depth.shape[1]] = depth
+        return padded.reshape(height, factor, width, factor).max(axis=(1, 3))
+    
+    def occluded(self, mesh : Mesh, models : np.ndarray) -> np.ndarray:
+        occluded = np.zeros(len(models), dtype=bool)
+        if self.hiz is None or not self.occlusion_culling or not len(models):
+            return occluded
+        
+        lower, upper = mesh.bounds
+        corners      = np.where((np.arange(8)[:, None] >> np.arange(3)) & 1, upper, lower)
+        mvp          = self.view_projection_array @ models
+        clip         = np.einsum('nij,kj->nki', mvp[:, :, :3], corners) + mvp[:, None, :, 3]
+        testable     = (clip[..., 3] > self.clip_near).all(axis=1)
+
+        if not testable.any():
+            return occluded
+        
+        ndc    = clip[testable, :, :3] / clip[testable, :, 3:]
+        width  = self.size[0] - 1
+        height = self.size[1] - 1
+        x0     = np.clip(np.floor((ndc[..., 0].min(axis=1) + 1.0) * self.half_size[0]), 0, width).astype(np.int64)
+        x1     = np.clip(np.floor((ndc[..., 0].max(axis=1) + 1.0) * self.half_size[0]), 0, width).astype(np.int64)
+        y0     = np.clip(np.floor((ndc[..., 1].min(axis=1) + 1.0) * self.half_size[1]), 0, height).astype(np.int64)
+        y1     = np.clip(np.floor((ndc[..., 1].max(axis=1) + 1.0) * self.half_size[1]), 0, height).astype(np.int64)
+        near   = ndc[..., 2].min(axis=1)
+        extent = np.maximum(x1 - x0, y1 - y0) + 1
+        levels = np.clip(np.ceil(np.log2(np.maximum(extent / self.hiz_block, 1.0))), 0, len(self.hiz) - 1).astype(np.int64)
+        finer  = np.maximum(levels - 1, 0)
+        shift  = self.hiz_block << finer
+        levels = np.where((x1 // shift - x0 // shift <= 1) & (y1 // shift - y0 // shift <= 1), finer, levels)
+        result = np.zeros(len(near), dtype=bool)
+
+        for level in np.unique(levels).tolist():
+            selected = levels == level
+            texels   = self.hiz[level]
+            size     = self.hiz_block << level
+            tx0, tx1 = x0[selected] // size, x1[selected] // size
+            ty0, ty1 = y0[selected] // size, y1[selected] // size
+            farthest = np.maximum(np.maximum(texels[ty0, tx0], texels[ty0, tx1]), np.maximum(texels[ty1, tx0], texels[ty1, tx1]))
+            result[selected] = near[selected] > farthest
+        
+        occluded[testable] = result
+        return occluded
+    
+    def render_objects(self, surface, objects : Sequence['GameObject'], mode : str = 'solid'):
+        occluders = [obj for obj in objects if obj.occluder]
+        others    = [obj for obj in objects if not obj.occluder]
+
+        for obj in occluders:
+            obj.render(surface, self, mode)
+        if occluders and self.occlusion_culling and mode == 'solid':
+            self.build_occlusion(surface)
+        for obj in others:
+            obj.render(surface, self, mode)
+    
+    def select_lods(self, mesh : Mesh, centers : np.ndarray, radii : np.ndarray, previous : Optional[np.ndarray] = None) -> np.ndarray:
+        lods = mesh.lods
+        if self.lod_error is None or len(lods) == 1:
+            return np.zeros(len(centers), dtype=np.int64)
+        
+        depth  = centers @ self.view_array[2, :3] + self.view_array[2, 3]
+        scale  = radii / (mesh.sphere[1] or 1.0) * self.projection_array[1, 1] * self.half_size[1] / np.maximum(depth, self.clip_near)
+        errors = np.array([lod.error for lod in lods]) * scale[:, None]
+        levels = (errors <= self.lod_error).sum(axis=1) - 1
+
+        if previous is not None:
+            strict = (errors <= self.lod_error * (1.0 - self.lod_hysteresis)).sum(axis=1) - 1
+            levels = np.where(levels > previous, np.maximum(previous, strict), levels)
+        return levels
+    
+    def select_lod(self, transform : Transform, mesh : Mesh) -> Mesh:
+        if self.lod_error is None or len(mesh.lods) == 1:
+            return mesh
+        
+        center, radius = transform.get_world_sphere(mesh)
+        previous       = np.array([transform.lod[1]]) if transform.lod is not None and transform.lod[0] is mesh else None
+        level          = int(self.select_lods(mesh, center[None], np.array([radius]), previous)[0])
+        transform.lod  = (mesh, level)
+        return mesh.lods[level]
+    
+    def lap(self, stage : Optional[str] = None):
+        if self.profiler is not None:
+            self.profiler.lap(stage)
+    
+    def count(self, name : str, value : int = 1):
+        if self.profiler is not None:
+            self.profiler.count(name, value)
+    
+    def get_matrices(self, transform : Transform) -> Tuple[np.ndarray, np.ndarray]:
+        transform.refresh()
+
+        if (cache := transform.view_cache) is None or cache[0] is not self or cache[1] != self.version or cache[2] != transform.version:
+            model = transform.get_model_array()
+            cache = transform.view_cache = (
+                self, self.version, transform.version,
+                self.view_array @ model,
+                self.view_projection_array @ model
+            )
+        
+        return cache[3], cache[4]
     
     def transform_viewport(self, vec : vec3) -> Tuple[Tuple[int, int], float]:
         return (
@@ -64,10 +297,320 @@ class Camera:
             int((vec.y + 1.0) * self.half_size[1])
         ), (vec.z + 1.0) * self.clip
     
+    def get_framebuffer(self, surface) -> Framebuffer:
+        if isinstance(surface, Framebuffer):
+            return surface
+        if self.framebuffer is None or not self.framebuffer.matches(surface):
+            size  = surface.get_size()
+            depth = self.framebuffer.base_depth if self.framebuffer is not None else np.empty((0, 0))
+            if size[0] > depth.shape[1] or size[1] > depth.shape[0]:
+                width, height = grow_capacity(size, (depth.shape[1], depth.shape[0]))
+                depth         = np.full((height, width), np.inf, dtype=np.float64)
+            self.framebuffer = Framebuffer.from_surface(surface, depth)
+        return self.framebuffer
+    
+    def get_target(self, surface) -> Framebuffer:
+        framebuffer = self.get_framebuffer(surface)
+        return self.get_tiles(framebuffer).framebuffer if self.workers else framebuffer
+    
+    def get_tiles(self, framebuffer : Framebuffer) -> TileRasterizer:
+        tiles = self.tiles
+
+        if tiles is not None and tiles.workers == self.workers and tiles.framebuffer.shifts == framebuffer.shifts and tiles.framebuffer.fits(framebuffer.size):
+            if tiles.size != framebuffer.size:
+                tiles.resize(framebuffer.size)
+            return tiles
+        
+        capacity = (0, 0)
+        if tiles is not None:
+            capacity = tiles.framebuffer.capacity
+            tiles.close()
+        
+        self.tiles = TileRasterizer(framebuffer.size, framebuffer.shifts, bool(framebuffer.alpha), self.workers, capacity=grow_capacity(framebuffer.size, capacity))
+        return self.tiles
+    
     def clear(self, surface):
-        surface.fill((0,0,0))
+        self.lap()
+        framebuffer = self.get_framebuffer(surface)
+        target      = framebuffer
+        self.stats  = dict.fromkeys(self.stats, 0)
+        self.hiz    = None
+
+        if self.workers:
+            target = self.get_tiles(framebuffer).framebuffer
+            self.pending.clear()
+        
+        damage = None
+        if self.dirty_rects and self.drawn is not None and framebuffer is self._dirty_target:
+            damage = self.merge_rects(self.drawn)
+            if self.rects_area(damage) > self.dirty_limit * framebuffer.size[0] * framebuffer.size[1]:
+                damage = None
+        
+        if damage is None:
+            target.clear((0, 0, 0))
+        else:
+            for rect in damage:
+                target.clear((0, 0, 0), rect)
+        
+        self.damage        = damage
+        self.drawn         = [] if self.dirty_rects else None
+        self._dirty_target = framebuffer
+        self.lap('clear')
+    
+    def flush(self, surface):
+        if not self.workers:
+            return
+        
+        self.lap()
+        framebuffer = self.get_framebuffer(surface)
+        tiles       = self.draw_pending(framebuffer)
+        
+        if (region := self.dirty_region()) is None:
+            framebuffer.color[...] = tiles.framebuffer.color
+        else:
+            for x, y, width, height in region:
+                framebuffer.color[y:y + height, x:x + width] = tiles.framebuffer.color[y:y + height, x:x + width]
+        self.lap('present')
+    
+    def draw_pending(self, framebuffer : Framebuffer) -> TileRasterizer:
+        tiles = self.get_tiles(framebuffer)
+
+        if self.pending:
+            triangles, colors = zip(*self.pending)
+            self.count('pixels', tiles.draw(np.concatenate(triangles), np.concatenate(colors)))
+            self.pending.clear()
+            self.lap('raster')
+        return tiles
+    
+    def mark_dirty(self, rect : Optional[Tuple[int, int, int, int]]):
+        if self.drawn is None or rect is None:
+            return
+        
+        left, top, right, bottom = rect
+        left, top     = max(left, 0), max(top, 0)
+        right, bottom = min(right, self.size[0]), min(bottom, self.size[1])
+
+        if left < right and top < bottom:
+            self.drawn.append((left, top, right, bottom))
+    
+    def screen_rect(self, points : np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        if not points.size:
+            return None
+        
+        points = points.reshape(-1, points.shape[-1])[:, :2]
+        lower  = np.clip(np.floor(points.min(axis=0)), 0, self.size)
+        upper  = np.clip(np.ceil(points.max(axis=0)) + 1, 0, self.size)
+        return int(lower[0]), int(lower[1]), int(upper[0]), int(upper[1])
+    
+    def dirty_region(self) -> Optional[List[Tuple[int, int, int, int]]]:
+        if self.damage is None or self.drawn is None:
+            return None
+        
+        rects = self.merge_rects(self.damage + self.drawn)
+        if self.rects_area(rects) > self.dirty_limit * self.size[0] * self.size[1]:
+            return None
+        return [(left, top, right - left, bottom - top) for left, top, right, bottom in rects]
+    
+    @staticmethod
+    def merge_rects(rects : List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, int, int]]:
+        merged = []
+
+        for left, top, right, bottom in rects:
+            index = 0
+            while index < len(merged):
+                l, t, r, b = merged[index]
+                if left <= r and l <= right and top <= b and t <= bottom:
+                    left, top, right, bottom = min(left, l), min(top, t), max(right, r), max(bottom, b)
+                    merged.pop(index)
+                    index = 0
+                else:
+                    index += 1
+            merged.append((left, top, right, bottom))
+        
+        return merged
+    
+    @staticmethod
+    def rects_area(rects : List[Tuple[int, int, int, int]]) -> int:
+        return sum((right - left) * (bottom - top) for left, top, right, bottom in rects)
+    
+    def close(self):
+        if self.tiles is not None:
+            self.tiles.close()
+            self.tiles = None
+
+    def render_solid(self, surface, transform : Transform, mesh : Mesh, color : Tuple[int, int, int]):
+        self.lap()
+        if self.cull(transform, mesh):
+            self.lap('transform')
+            return
+        
+        mesh          = self.select_lod(transform, mesh)
+        model_view, _ = self.get_matrices(transform)
+        model_view    = mesh.fold(model_view)
+        view          = mesh.positions @ model_view[:3, :3].T + model_view[:3, 3]
+        self.count('vertices', len(view))
+        self.draw_solid(surface, view, mesh.indices, np.asarray(color, dtype=np.float64))
+
+    def render_instanced_solid(self, surface, mesh : Mesh, models : Union[Sequence[Transform], np.ndarray], colors : Union[Sequence[Tuple[int, int, int]], np.ndarray]):
+        self.lap()
+        models  = self.stack_models(models)
+        visible = self.cull_instances(mesh, models)
+        colors  = np.asarray(colors, dtype=np.float64).reshape(-1, 3)[visible]
+
+        view, indices = self.transform_instances(mesh, models[visible])
+        self.count('vertices', len(view))
+        self.draw_solid(surface, view, indices, np.repeat(colors, mesh.triangle_count, axis=0))
 
     def render_wireframe(self, surface, transform : Transform, mesh : Mesh):
+        self.lap()
+        if self.cull(transform, mesh):
+            self.lap('transform')
+            return
+        
+        mesh   = self.select_lod(transform, mesh)
+        _, mvp = self.get_matrices(transform)
+        mvp    = mesh.fold(mvp)
+        self.count('vertices', mesh.vertex_count)
+        self.draw_wireframe(surface, mesh.positions @ mvp[:, :3].T + mvp[:, 3], mesh.indices, mesh.edges, mesh.face_edges)
+
+    def render_instanced_wireframe(self, surface, mesh : Mesh, models : Union[Sequence[Transform], np.ndarray]):
+        self.lap()
+        models        = self.stack_models(models)
+        models        = models[self.cull_instances(mesh, models)]
+        mvps          = mesh.fold(self.view_projection_array @ models)
+        clip          = np.matmul(mesh.positions, mvps[:, :, :3].transpose(0, 2, 1)) + mvps[:, None, :, 3]
+        indices       = self.offset_instances(mesh.indices, len(models), mesh.vertex_count)
+        edges         = self.offset_instances(mesh.edges, len(models), mesh.vertex_count)
+        face_edges    = self.offset_instances(mesh.face_edges, len(models), len(mesh.edges))
+        self.count('vertices', len(models) * mesh.vertex_count)
+        self.draw_wireframe(surface, clip.reshape(-1, 4), indices, edges, face_edges)
+
+    def stack_models(self, models : Union[Sequence[Transform], np.ndarray]) -> np.ndarray:
+        if isinstance(models, np.ndarray):
+            return models.reshape(-1, 4, 4)
+        return np.array([transform.get_model_array() for transform in models]).reshape(-1, 4, 4)
+
+    def cull_instances(self, mesh : Mesh, models : np.ndarray) -> np.ndarray:
+        center, radius = mesh.sphere
+        centers        = models[:, :3, :3] @ center + models[:, :3, 3]
+        radii          = radius * np.sqrt((models[:, :3, :3] ** 2).sum(axis=1).max(axis=1))
+        visible        = self.cull_spheres(centers, radii)
+
+        culled = len(models) - int(np.count_nonzero(visible))
+        self.stats['objects'] += len(models)
+        self.stats['culled']  += culled
+        self.count('objects', len(models))
+        self.count('culled', culled)
+
+        if self.hiz is not None and culled < len(models):
+            occluded          = self.occluded(mesh, models[visible])
+            visible[visible] &= ~occluded
+            self.stats['occluded'] += int(np.count_nonzero(occluded))
+            self.count('occluded', int(np.count_nonzero(occluded)))
+        return visible
+
+    def transform_instances(self, mesh : Mesh, models : np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        model_views = mesh.fold(self.view_array @ models)
+        view        = np.matmul(mesh.positions, model_views[:, :3, :3].transpose(0, 2, 1)) + model_views[:, None, :3, 3]
+        return view.reshape(-1, 3), self.offset_instances(mesh.indices, len(models), mesh.vertex_count)
+
+    def offset_instances(self, indices : np.ndarray, count : int, stride : int) -> np.ndarray:
+        offsets = np.arange(count, dtype=np.int32)[:, None, None] * stride
+        return (indices + offsets).reshape(-1, indices.shape[1])
+
+    def draw_solid(self, surface, view : np.ndarray, indices : np.ndarray, colors : np.ndarray):
+        framebuffer = self.get_framebuffer(surface)
+        projection  = self.projection_array
+        clip        = view @ projection[:, :3].T + projection[:, 3]
+        self.lap('transform')
+
+        codes    = self.outcodes(clip)[indices]
+        corners  = view[indices]
+        normals  = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        centers  = corners.mean(axis=1)
+        facing   = -np.einsum('ij,ij->i', normals, centers)
+        visible  = (facing > 0.0) & (np.bitwise_and.reduce(codes, axis=1) == 0)
+
+        if not visible.any():
+            self.count('triangles_culled', len(indices))
+            self.lap('clip')
+            return
+
+        if colors.ndim == 2:
+            colors = colors[visible]
+
+        lambert  = facing[visible] / (np.linalg.norm(normals[visible], axis=1) * np.linalg.norm(centers[visible], axis=1))
+        colors   = framebuffer.pack((self.ambient + (1.0 - self.ambient) * lambert)[:, None] * colors)
+        self.count('triangles_culled', len(indices) - len(lambert))
+        indices  = indices[visible]
+        crossing = (np.bitwise_or.reduce(codes[visible], axis=1) & 0b110000) != 0
+
+        if crossing.any():
+            clipped, source = clip_triangles(clip[indices[crossing]])
+            self.count('triangles_clipped', int(np.count_nonzero(crossing)))
+            triangles       = np.concatenate((self.project(clip)[indices[~crossing]], self.project(clipped.reshape(-1, 4)).reshape(-1, 3, 3)))
+            colors          = np.concatenate((colors[~crossing], colors[crossing][source]))
+        else:
+            triangles       = self.project(clip)[indices]
+        self.count('triangles_drawn', len(triangles))
+        if self.drawn is not None:
+            self.mark_dirty(self.screen_rect(triangles))
+        self.lap('clip')
+
+        if self.workers:
+            self.pending.append((triangles, colors))
+        else:
+            self.count('pixels', rasterize(framebuffer, triangles, colors))
+            self.lap('raster')
+
+    def draw_wireframe(self, surface, clip : np.ndarray, indices : np.ndarray, edges : np.ndarray, face_edges : np.ndarray):
+        self.lap('transform')
+        target = self.get_target(surface)
+        codes  = self.outcodes(clip)
+        screen = self.project(clip)
+
+        if self.backface_culling:
+            corners = screen[indices]
+            area    = (corners[:, 1, 0] - corners[:, 0, 0]) * (corners[:, 2, 1] - corners[:, 0, 1]) - (corners[:, 2, 0] - corners[:, 0, 0]) * (corners[:, 1, 1] - corners[:, 0, 1])
+            front   = (area < 0.0) | ((np.bitwise_or.reduce(codes[indices], axis=1) & 0b010000) != 0)
+            visible = np.zeros(len(edges), dtype=bool)
+            visible[face_edges[front]] = True
+            edges   = edges[visible]
+
+        a, b     = codes[edges[:, 0]], codes[edges[:, 1]]
+        keep     = (a & b) == 0
+        crossing = ((a | b)[keep] & 0b110000) != 0
+        edges    = edges[keep]
+
+        start, end = screen[edges[~crossing, 0], :2], screen[edges[~crossing, 1], :2]
+
+        if crossing.any():
+            clip_start, clip_end = clip_segments(clip[edges[crossing, 0]], clip[edges[crossing, 1]])
+            start = np.concatenate((start, self.project(clip_start)[:, :2]))
+            end   = np.concatenate((end, self.project(clip_end)[:, :2]))
+        self.count('lines_drawn', len(start))
+        if self.drawn is not None:
+            self.mark_dirty(self.screen_rect(np.concatenate((start, end))))
+        self.lap('clip')
+
+        self.count('pixels', draw_lines(target, start, end, target.pack(np.array((255, 255, 255)))))
+        self.lap('raster')
+
+    def outcodes(self, clip : np.ndarray) -> np.ndarray:
+        x, y, z, w = clip.T
+        return (x < -w) | (x > w) << 1 | (y < -w) << 2 | (y > w) << 3 | (z < -w) << 4 | (z > w) << 5
+
+    def project(self, clip : np.ndarray) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ndc = clip[:, :3] / clip[:, 3:]
+        
+        return np.column_stack((
+            (ndc[:, 0] + 1.0) * self.half_size[0],
+            (ndc[:, 1] + 1.0) * self.half_size[1],
+            ndc[:, 2]
+        ))
+
+    def render_wireframe_reference(self, surface, transform : Transform, mesh : Mesh):
         mvp = self.projection_matrix @ self.view_matrix @ transform.get_model_view()
 
         h_to_c = homogeneous_to_cartesian
@@ -95,6 +638,7 @@ class Camera:
     def resize(self, size : Tuple[int, int]):
         self.size      = size
         self.half_size = (size[0] // 2, size[1] // 2)
+        self.drawn     = None
         self.update_projection()
     
     def __str__(self):
@@ -104,18 +648,43 @@ class Camera:
         return f"<Camera at {self.transform.position}, fov={self.fov}, size={self.size}>"
 
 class GameObject:
-    def __init__(self, name : str, transform : Transform, mesh : Mesh, bias : Transform, color : Tuple[int, int, int]):
+    def __init__(self, name : str, transform : Transform, mesh : Optional[Mesh], bias : Transform, color : Tuple[int, int, int], occluder : bool = False):
         self.name      = name
         self.transform = transform
         self.mesh      = mesh
         self.bias      = bias
         self.color     = color
+        self.occluder  = occluder
+        self.mesh_path  : Optional[str]       = None
+        self.mesh_cache : Optional[MeshCache] = None
+    
+    def assign(self, mesh : Optional[Mesh], path : Optional[str] = None, cache : Optional[MeshCache] = None):
+        self.release()
+        self.mesh       = mesh
+        self.mesh_path  = path
+        self.mesh_cache = cache
+    
+    def release(self):
+        if self.mesh_path is not None:
+            self.mesh_cache.release(self.mesh_path)
+        self.mesh, self.mesh_path, self.mesh_cache = None, None, None
     
     def render_wireframe(self, surface, camera: Camera):
-        camera.render_wireframe(surface, self.transform, self.mesh)
+        if self.mesh is not None:
+            camera.render_wireframe(surface, self.transform, self.mesh)
     
     def render_solid(self, surface, camera: Camera):
-        camera.render_solid(surface, self.transform, self.mesh, self.color)
+        if self.mesh is not None:
+            camera.render_solid(surface, self.transform, self.mesh, self.color)
+    
+    def render(self, surface, camera : Camera, mode : str = 'solid'):
+        if self.mesh is None:
+            return
+        
+        if mode == 'solid':
+            camera.render_solid(surface, self.transform, self.mesh, self.color)
+        else:
+            camera.render_wireframe(surface, self.transform, self.mesh)
     
     def update(self, delta_time : float):
         self.transform.position += self.bias.position * delta_time
@@ -126,4 +695,376 @@ class GameObject:
         return f"<GameObject '{self.name}' at {self.transform.position}>"
     
     def __repr__(self):
-        return f"<GameObject '{self.name}' at {self.transform.position}>"
\ No newline at end of file
+        return f"<GameObject '{self.name}' at {self.transform.position}>"
+
+class SceneVector(vec3):
+    __slots__ = ('scene', 'field', 'index')
+
+    def __init__(self, scene : 'Scene', field : str, index : int):
+        self.scene, self.field, self.index = scene, field, index
+    
+    def component(axis : int) -> property:
+        def get(self) -> float:
+            return float(getattr(self.scene, self.field).data[self.index, axis])
+        
+        def set(self, value : float):
+            getattr(self.scene, self.field).data[self.index, axis] = value
+            self.scene.touch(self.field, self.index)
+        
+        return property(get, set)
+    
+    x, y, z = component(0), component(1), component(2)
+    del component
+
+def scene_vector(field : str) -> property:
+    def get(self) -> SceneVector:
+        return SceneVector(self.scene, field, self.index)
+    
+    def set(self, value : vec3):
+        getattr(self.scene, field).data[self.index] = (value.x, value.y, value.z)
+        self.scene.touch(field, self.index)
+    
+    return property(get, set)
+
+class SceneTransform(Transform):
+    position = scene_vector('positions')
+    rotation = scene_vector('rotations')
+    scale    = scene_vector('scales')
+
+    def __init__(self, scene : 'Scene', index : int):
+        self.scene      = scene
+        self.index      = index
+        self.version    = 0
+        self.view_cache = None
+        self._key       = None
+        self._model     = None
+        self._array     = None
+        self._inverse   = None
+        self._sphere    = None
+        self.lod        = None
+    
+    def refresh(self) -> bool:
+        self.scene.refresh()
+
+        if self._key == (version := int(self.scene.versions[self.index])):
+            return False
+        
+        self._key     = version
+        self._model   = None
+        self._array   = None
+        self._inverse = None
+        self.version  = version
+        return True
+    
+    def get_model_view(self) -> mat4:
+        self.refresh()
+        if self._model is None:
+            self._model = mat4(*self.scene.models.data[self.index].ravel().tolist())
+        return self._model
+    
+    def get_model_array(self) -> np.ndarray:
+        self.refresh()
+        if self._array is None:
+            self._array = self.scene.models.data[self.index].copy()
+        return self._array
+    
+    def get_inverse_model_view(self) -> mat4:
+        if self.refresh() or self._inverse is None:
+            self._inverse = self.get_model_view().invert_affine()
+        return self._inverse
+
+class SceneBias:
+    position = scene_vector('bias_positions')
+    rotation = scene_vector('bias_rotations')
+    scale    = scene_vector('bias_scales')
+
+    def __init__(self, scene : 'Scene', index : int):
+        self.scene = scene
+        self.index = index
+    
+    def __str__(self) -> str:
+        return f"(position={self.position}, rotation={self.rotation}, scale={self.scale})"
+    
+    def __repr__(self) -> str:
+        return f"SceneBias({repr(self.position)}, {repr(self.rotation)}, {repr(self.scale)})"
+
+class Scene:
+    FIELDS = ('positions', 'rotations', 'scales', 'bias_positions', 'bias_rotations', 'bias_scales')
+
+    def __init__(self, objects : Sequence[GameObject] = (), capacity : int = 64):
+        self.objects    : List[GameObject] = []
+        self.capacity   = 0
+        self.generation = 0
+        self.animated   = None
+        self.models     = mat4_array(np.zeros((0, 4, 4)))
+        self.versions   = np.zeros(0, dtype=np.int64)
+        self.dirty      = np.zeros(0, dtype=bool)
+        self.centers    = np.zeros((0, 3))
+        self.radii      = np.zeros(0)
+        self.levels     = np.zeros(0, dtype=np.int64)
+        self._pending   = False
+
+        for field in self.FIELDS:
+            setattr(self, field, vec3_array(np.zeros((0, 3))))
+        
+        self.reserve(capacity)
+        for obj in objects:
+            self.add(obj)
+    
+    def reserve(self, capacity : int):
+        if capacity <= self.capacity:
+            return
+        
+        for field in self.FIELDS:
+            setattr(self, field, vec3_array(self._grow(getattr(self, field).data, capacity)))
+        
+        self.models   = mat4_array(self._grow(self.models.data, capacity))
+        self.versions = self._grow(self.versions, capacity)
+        self.dirty    = self._grow(self.dirty, capacity)
+        self.centers  = self._grow(self.centers, capacity)
+        self.radii    = self._grow(self.radii, capacity)
+        self.levels   = self._grow(self.levels, capacity)
+        self.capacity = capacity
+    
+    def _grow(self, data : np.ndarray, capacity : int) -> np.ndarray:
+        count = len(self.objects)
+        grown = np.zeros((capacity, *data.shape[1:]), dtype=data.dtype)
+        grown[:count] = data[:count]
+        return grown
+    
+    def add(self, obj : GameObject) -> GameObject:
+        if len(self.objects) == self.capacity:
+            self.reserve(self.capacity * 2)
+        
+        index = len(self.objects)
+        self.objects.append(obj)
+
+        for field, vec in zip(self.FIELDS, (obj.transform.position, obj.transform.rotation, obj.transform.scale, obj.bias.position, obj.bias.rotation, obj.bias.scale)):
+            getattr(self, field).data[index] = (vec.x, vec.y, vec.z)
+        self.centers[index], self.radii[index] = obj.mesh.sphere if obj.mesh is not None else (0.0, 0.0)
+        self.levels[index] = 0
+
+        obj.transform = SceneTransform(self, index)
+        obj.bias      = SceneBias(self, index)
+        self.animated = None
+        self.touch('positions', index)
+        return obj
+    
+    def attach(self, obj : GameObject, mesh : Mesh, path : Optional[str] = None, cache : Optional[MeshCache] = None):
+        if obj not in self:
+            raise ValueError(f"{obj} is not part of this scene.")
+        
+        index = obj.transform.index
+        obj.assign(mesh, path, cache)
+        self.centers[index], self.radii[index] = mesh.sphere
+        self.levels[index] = 0
+    
+    def remove(self, obj : GameObject):
+        index = obj.transform.index
+        last  = len(self.objects) - 1
+
+        if self.objects[index] is not obj:
+            raise ValueError(f"{obj} is not part of this scene.")
+        
+        transform, bias = obj.transform, obj.bias
+        obj.transform   = Transform(vec3(*self.positions.data[index].tolist()), vec3(*self.rotations.data[index].tolist()), vec3(*self.scales.data[index].tolist()))
+        obj.bias        = Transform(vec3(*self.bias_positions.data[index].tolist()), vec3(*self.bias_rotations.data[index].tolist()), vec3(*self.bias_scales.data[index].tolist()))
+        transform.scene = bias.scene = None
+        obj.release()
+
+        if index != last:
+            moved = self.objects[index] = self.objects[last]
+            for field in self.FIELDS:
+                getattr(self, field).data[index] = getattr(self, field).data[last]
+            self.centers[index], self.radii[index] = self.centers[last], self.radii[last]
+            self.levels[index] = self.levels[last]
+            moved.transform.index = moved.bias.index = index
+            self.touch('positions', index)
+        
+        for field in self.FIELDS:
+            getattr(self, field).data[last] = 0.0
+        self.objects.pop()
+        self.dirty[last] = False
+        self.animated    = None
+    
+    def touch(self, field : str, index : int):
+        if field.startswith('bias'):
+            self.animated = None
+        else:
+            self.dirty[index] = True
+            self._pending     = True
+    
+    def update(self, delta_time : float):
+        count = len(self.objects)
+        if count == 0:
+            return
+        
+        if self.animated is None:
+            self.animated = np.flatnonzero(
+                self.bias_positions.data[:count].any(axis=1) |
+                self.bias_rotations.data[:count].any(axis=1) |
+                self.bias_scales.data[:count].any(axis=1)
+            )
+        
+        if len(self.animated) == count:
+            self.positions.add_scaled(self.bias_positions, delta_time)
+            self.rotations.add_scaled(self.bias_rotations, delta_time)
+            self.scales.add_scaled(self.bias_scales, delta_time)
+            self.dirty[:count] = True
+        elif len(self.animated):
+            animated = self.animated
+            self.positions.data[animated] += self.bias_positions.data[animated] * delta_time
+            self.rotations.data[animated] += self.bias_rotations.data[animated] * delta_time
+            self.scales.data[animated]    += self.bias_scales.data[animated] * delta_time
+            self.dirty[animated] = True
+        else:
+            return
+        self._pending = True
+    
+    def refresh(self):
+        if not self._pending:
+            return
+        
+        dirty = np.flatnonzero(self.dirty[:len(self.objects)])
+        self.models.data[dirty] = mat4_array.compose(self.positions[dirty], self.rotations[dirty], self.scales[dirty]).data
+        self.versions[dirty]    = np.arange(self.generation + 1, self.generation + 1 + len(dirty))
+        self.generation        += len(dirty)
+        self.dirty[dirty]       = False
+        self._pending           = False
+    
+    def spheres(self, indices : Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        self.refresh()
+        if indices is None:
+            indices = slice(0, len(self.objects))
+        
+        models  = self.models.data[indices]
+        centers = np.matmul(models[:, :3, :3], self.centers[indices, :, None])[..., 0] + models[:, :3, 3]
+        radii   = self.radii[indices] * np.sqrt((models[:, :3, :3] ** 2).sum(axis=1).max(axis=1))
+        return centers, radii
+    
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        centers, radii = self.spheres()
+        return centers - radii[:, None], centers + radii[:, None]
+    
+    def __len__(self) -> int:
+        return len(self.objects)
+    
+    def __iter__(self):
+        return iter(self.objects)
+    
+    def __contains__(self, obj : GameObject) -> bool:
+        return isinstance(obj.transform, SceneTransform) and obj.transform.scene is self and self.objects[obj.transform.index] is obj
+    
+    def __str__(self) -> str:
+        return f"<Scene {len(self.objects)} object(s)>"
+    
+    def __repr__(self) -> str:
+        return f"<Scene {len(self.objects)} object(s)>"
+
+class BVH:
+    def __init__(self, objects : List[GameObject], leaf_size : int = 4):
+        self.objects   = list(objects)
+        self.leaf_size = leaf_size
+        self.stats     = dict.fromkeys(('nodes', 'nodes_culled', 'culled'), 0)
+        self.rebuild()
+    
+    def object_bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        centers = np.empty((len(self.objects), 3))
+        radii   = np.empty(len(self.objects))
+
+        for index, obj in enumerate(self.objects):
+            if obj.mesh is None:
+                centers[index], radii[index] = obj.transform.get_model_array()[:3, 3], 0.0
+            else:
+                centers[index], radii[index] = obj.transform.get_world_sphere(obj.mesh)
+        
+        return centers - radii[:, None], centers + radii[:, None]
+    
+    def rebuild(self):
+        lower, upper = self.object_bounds()
+        self.order   : List[int] = []
+        self.nodes   : List[List] = []
+
+        if self.objects:
+            self._build(np.arange(len(self.objects)), (lower + upper) * 0.5)
+        self.refit(lower, upper)
+    
+    def _build(self, items : np.ndarray, centers : np.ndarray) -> int:
+        index = len(self.nodes)
+        node  = [None, None, -1, -1, len(self.order), len(items)]
+        self.nodes.append(node)
+
+        if len(items) <= self.leaf_size:
+            self.order.extend(items.tolist())
+            return index
+        
+        points = centers[items]
+        axis   = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+        items  = items[np.argsort(points[:, axis], kind='stable')]
+        half   = len(items) // 2
+
+        node[2] = self._build(items[:half], centers)
+        node[3] = self._build(items[half:], centers)
+        return index
+    
+    def refit(self, lower : np.ndarray = None, upper : np.ndarray = None):
+        if lower is None:
+            lower, upper = self.object_bounds()
+        
+        order = np.array(self.order, dtype=np.int64)
+
+        for node in reversed(self.nodes):
+            if node[2] < 0:
+                items   = order[node[4]:node[4] + node[5]]
+                node[0] = lower[items].min(axis=0).tolist()
+                node[1] = upper[items].max(axis=0).tolist()
+            else:
+                left, right = self.nodes[node[2]], self.nodes[node[3]]
+                node[0] = [min(a, b) for a, b in zip(left[0], right[0])]
+                node[1] = [max(a, b) for a, b in zip(left[1], right[1])]
+    
+    def cull(self, camera : Camera) -> List[GameObject]:
+        self.stats = dict.fromkeys(self.stats, 0)
+        planes     = camera.frustum.tolist()
+        visible    = []
+        stack      = [(0, False)] if self.nodes else []
+
+        while stack:
+            index, inside = stack.pop()
+            node          = self.nodes[index]
+            self.stats['nodes'] += 1
+
+            if not inside:
+                (x0, y0, z0), (x1, y1, z1) = node[0], node[1]
+                cx, cy, cz = (x0 + x1) * 0.5, (y0 + y1) * 0.5, (z0 + z1) * 0.5
+                ex, ey, ez = (x1 - x0) * 0.5, (y1 - y0) * 0.5, (z1 - z0) * 0.5
+                state      = 1
+
+                for a, b, c, d in planes:
+                    distance = a * cx + b * cy + c * cz + d
+                    extent   = abs(a) * ex + abs(b) * ey + abs(c) * ez
+                    if distance < -extent:
+                        state = -1
+                        break
+                    if distance < extent:
+                        state = 0
+                
+                if state < 0:
+                    self.stats['nodes_culled'] += 1
+                    self.stats['culled']       += node[5]
+                    continue
+                inside = state > 0
+            
+            if node[2] < 0:
+                visible.extend(self.objects[item] for item in self.order[node[4]:node[4] + node[5]])
+            else:
+                stack.append((node[3], inside))
+                stack.append((node[2], inside))
+        
+        return visible
+    
+    def __str__(self) -> str:
+        return f"<BVH {len(self.objects)} object(s), {len(self.nodes)} node(s)>"
+    
+    def __repr__(self) -> str:
+        return f"<BVH {len(self.objects)} object(s), {len(self.nodes)} node(s)>"
\ No newline at end of file